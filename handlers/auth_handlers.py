@@ -5,11 +5,10 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from config import API_TELEGRAM, SCHOOL_AUTH_PSWD, PATH_TO_USERS_FILE, NON_DISPLAY_CHARACTER
+from config import API_TELEGRAM, SCHOOL_AUTH_PSWD, NON_DISPLAY_CHARACTER
 from states import ActiveState
-from utils import read_json_file, write_json_file
 from keyboards import get_main_menu_kb
-from services import get_user_data, update_user_data, save_user_consent
+from services import get_user_data, update_user_data, save_user_consent, create_user
 
 router = Router()
 
@@ -57,9 +56,7 @@ async def authorization(message: Message, state: FSMContext):
             "phone": "Не указано"
         }
         
-        data = read_json_file(PATH_TO_USERS_FILE)
-        data[str(message.from_user.id)] = user_profile
-        write_json_file(PATH_TO_USERS_FILE, data)
+        await create_user(str(message.from_user.id), user_profile)
 
         await state.clear()      
         await message.answer(
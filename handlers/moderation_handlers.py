@@ -1,4 +1,3 @@
-import os
 import json
 import random
 import difflib
@@ -6,14 +5,16 @@ import re
 import datetime
 import asyncio
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, MEDIA_FOLDER_NAME, MODERATORS_CHAT_ID, NON_DISPLAY_CHARACTER
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, MODERATORS_CHAT_ID, NON_DISPLAY_CHARACTER
 from states import ActiveState
-from utils import read_json_file, write_json_file, check_authorization, is_moderator, date_validation, send_not_authorized, send_not_moderator
-from services import get_user_data, get_project_data, get_all_projects, update_user_data, delete_project, give_reward_to_project_members, add_points_to_member, ban_user, unban_user, is_user_banned
+from utils import read_json_file_async, check_authorization, is_moderator, date_validation, send_not_authorized, send_not_moderator, send_project_photo
+from services import get_user_data, get_project_data, get_all_projects, update_user_data, update_project_data, delete_project, give_reward_to_project_members, add_points_to_member, ban_user, unban_user, is_user_banned, set_preview_photo
+from media import save_project_photo
+import search_index
 from keyboards import get_adding_projects_md_kb, get_projects_menu_kb, generate_projects_category_menu_kb, get_back_to_main_menu_kb, get_back_to_project_editing_kb
 
 router = Router()
@@ -24,7 +25,7 @@ async def all_users(message: Message):
         await send_not_moderator(message)
         return
 
-    data_us = read_json_file(PATH_TO_USERS_FILE)
+    data_us = await read_json_file_async(PATH_TO_USERS_FILE)
     text = f'Всего пользователей: {len(data_us)}\n\n'
     for index, user in enumerate(data_us, 1):
         name = f'{index} {data_us[user].get("name")} {data_us[user].get("surname")} ID: <code>{user}</code>\n'
@@ -64,89 +65,89 @@ async def search_users(message: Message):
     
     await perform_user_search(message, search_query, max_results)
 
+def _search_fields(user_id: str, user_data: dict) -> dict:
+    return {
+        'user_id': user_id,
+        'username': user_data.get('username', '').lower(),
+        'name': user_data.get('name', '').lower(), 
+        'surname': user_data.get('surname', '').lower(),
+        'IDfirst': user_data.get('IDfirst', '').lower(),
+        'phone': user_data.get('phone', '').strip(NON_DISPLAY_CHARACTER).lower()
+    }
+
+async def fuzzy_user_search(users_data: dict, normalized_query: str) -> list:
+    """Частичные совпадения и похожие имена (кандидаты - из search_index)"""
+    scores = {}
+    
+    for user_id in search_index.substring_candidates(users_data, normalized_query):
+        fields = _search_fields(user_id, users_data[user_id])
+        if (normalized_query in fields['user_id'] or
+            normalized_query in fields['username'] or
+            normalized_query in fields['IDfirst'] or
+            normalized_query in fields['phone'].replace('-', '').replace('+', '')):
+            
+            scores[user_id] = 80  
+    
+    # difflib - только для короткого списка пользователей с похожими именами
+    for user_id in search_index.name_candidates(users_data, normalized_query):
+        if user_id in scores:
+            continue
+        fields = _search_fields(user_id, users_data[user_id])
+        full_name = f"{fields['name']} {fields['surname']}".strip()
+        if full_name:
+            name_ratio = difflib.SequenceMatcher(
+                None, normalized_query, full_name
+            ).ratio()
+            
+            # имя и фамилию
+            name_only_ratio = difflib.SequenceMatcher(
+                None, normalized_query, fields['name']
+            ).ratio() if fields['name'] else 0
+            
+            surname_only_ratio = difflib.SequenceMatcher(
+                None, normalized_query, fields['surname'] 
+            ).ratio() if fields['surname'] else 0
+            
+            max_name_ratio = max(name_ratio, name_only_ratio, surname_only_ratio)
+            
+            if max_name_ratio > 0.3:  #match_ratio
+                scores[user_id] = int(max_name_ratio * 100)
+    
+    fuzzy_matches = [
+        {
+            'user_id': user_id,
+            'user_data': users_data[user_id],
+            'score': score,
+            'exact_match': False
+        }
+        for user_id, score in scores.items()
+    ]
+    fuzzy_matches.sort(key=lambda x: x['score'], reverse=True)
+    return fuzzy_matches
+
 async def perform_user_search(message: Message, search_query: str, max_results: int = 5):
     """Выполняет поиск пользователей по всем полям"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     
     if not users_data:
         await message.answer("❌ База пользователей пуста", reply_markup=await get_back_to_main_menu_kb())
         return
     
-    search_results = []
-    exact_matches = []
-    fuzzy_matches = []
-    
     normalized_query = search_query.lower().strip()
     
-    for user_id, user_data in users_data.items():
-        fields = {
+    # Точные совпадения (TG ID, username, IDfirst, телефон) - по индексу, без обхода пользователей
+    search_results = [
+        {
             'user_id': user_id,
-            'username': user_data.get('username', '').lower(),
-            'name': user_data.get('name', '').lower(), 
-            'surname': user_data.get('surname', '').lower(),
-            'IDfirst': user_data.get('IDfirst', '').lower(),
-            'phone': user_data.get('phone', '').strip(NON_DISPLAY_CHARACTER).lower()
+            'user_data': users_data[user_id],
+            'score': 100,
+            'exact_match': True
         }
-        
-        exact_match = False
-        score = 0
-        
-        if (normalized_query == fields['user_id'] or 
-            normalized_query == fields['username'].replace('@', '') or
-            normalized_query == fields['IDfirst'] or
-            normalized_query == fields['phone'].replace('-', '').replace('+', '') or
-            search_query == user_data.get('username') or 
-            search_query == user_data.get('IDfirst') or
-            search_query == user_data.get('phone')):
-            
-            exact_match = True
-            score = 100
-        
-        elif (normalized_query in fields['user_id'] or
-              normalized_query in fields['username'] or
-              normalized_query in fields['IDfirst'] or
-              normalized_query in fields['phone'].replace('-', '').replace('+', '')):
-            
-            score = 80  
-        
-        else:
-            full_name = f"{fields['name']} {fields['surname']}".strip()
-            if full_name:
-                name_ratio = difflib.SequenceMatcher(
-                    None, normalized_query, full_name
-                ).ratio()
-                
-                # имя и фамилию
-                name_only_ratio = difflib.SequenceMatcher(
-                    None, normalized_query, fields['name']
-                ).ratio() if fields['name'] else 0
-                
-                surname_only_ratio = difflib.SequenceMatcher(
-                    None, normalized_query, fields['surname'] 
-                ).ratio() if fields['surname'] else 0
-                
-                max_name_ratio = max(name_ratio, name_only_ratio, surname_only_ratio)
-                
-                if max_name_ratio > 0.3:  #match_ratio
-                    score = int(max_name_ratio * 100)
-        
-        if score > 0:
-            user_result = {
-                'user_id': user_id,
-                'user_data': user_data,
-                'score': score,
-                'exact_match': exact_match
-            }
-            
-            if exact_match:
-                exact_matches.append(user_result)
-            else:
-                fuzzy_matches.append(user_result)
-    
-    exact_matches.sort(key=lambda x: x['score'], reverse=True)
-    fuzzy_matches.sort(key=lambda x: x['score'], reverse=True)
+        for user_id in search_index.exact_matches(users_data, search_query)
+    ]
     
-    search_results = exact_matches + fuzzy_matches
+    if not search_results:
+        search_results = await fuzzy_user_search(users_data, normalized_query)
     
     if not search_results:
         await message.answer(
@@ -239,8 +240,8 @@ async def remove_user_from_project_menu(callback: CallbackQuery, state: FSMConte
     data_parts = callback.data.split(":::")
     user_id = data_parts[1]
     
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     
     user_data = users_data.get(user_id, {})
     active_projects = user_data.get("active_projects", [])
@@ -295,8 +296,8 @@ async def confirm_remove_from_project(callback: CallbackQuery, state: FSMContext
     category = data_parts[2]
     project_id = data_parts[3]
     
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     
     project = projects_data.get(category, {}).get(project_id, {})
     user_data = users_data.get(user_id, {})
@@ -333,8 +334,8 @@ async def execute_remove_from_project(callback: CallbackQuery, state: FSMContext
     from services import remove_member_from_project
     result = await remove_member_from_project(user_id, category, project_id)
     
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     
     project = projects_data.get(category, {}).get(project_id, {})
     user_data = users_data.get(user_id, {})
@@ -376,7 +377,7 @@ async def ban_user_command(message: Message):
         await message.answer("❌ Неверный ID пользователя", reply_markup=await get_back_to_main_menu_kb())
         return
     
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     if user_id not in users_data:
         await message.answer("❌ Пользователь не найден", reply_markup=await get_back_to_main_menu_kb())
         return
@@ -458,7 +459,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     state_data = await state.get_data()
     project_name = state_data.get('project_name')
     
-    from services import free_id, create_project
+    from services import create_project
     project_id = await create_project(category, project_name)
 
     if not project_id:
@@ -472,7 +473,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     )
 
 async def get_project_editing_kb(category: str, project_id: str):
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     project_data = data[category].get(project_id, {})
     if not project_data:
         return []
@@ -529,7 +530,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     project_id = data_parts[2]
     await state.update_data(category=category, project_id=project_id)
 
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     data_project = data[category].get(project_id, {})
     if not data_project:
         await callback.message.edit_text("❌ Проект не найден", reply_markup=await get_back_to_main_menu_kb())
@@ -546,7 +547,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     url = data_project.get("url")
     photo_path = data_project.get('preview_photo')
     
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     member_list = []
     for index, member_id in enumerate(data_project.get("members", {}), 1):
         try:
@@ -571,11 +572,8 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     
     if photo_path:
         try:
-            with open(photo_path, 'rb') as file:
-                photo_bytes = file.read()
-            input_file = BufferedInputFile(photo_bytes, filename=os.path.basename(photo_path))
-            await callback.message.answer_photo(
-                photo=input_file,
+            await send_project_photo(
+                callback.message.answer_photo, category, project_id, data_project,
                 caption=project_info,
                 reply_markup=kb,
                 parse_mode="HTML"
@@ -615,7 +613,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
     project_id = data_parts[2]
     parm = data_parts[3]
     
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     project_data = data[category].get(project_id, {})
     
     if not project_data:
@@ -624,8 +622,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
        
     if parm.startswith("unleaveable_"):
         parm_state = 1 if parm.replace("unleaveable_", "") == "on" else 0
-        data[category][project_id]["unleaveable"] = int(parm_state)
-        write_json_file(PATH_TO_PROJECTS_FILE, data)
+        await update_project_data(category, project_id, "unleaveable", int(parm_state))
         await state.clear()
         try:
             await callback.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=await get_project_editing_kb(category=category, project_id=project_id)))
@@ -636,8 +633,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
 
     if parm.startswith("approval_"):
         parm_state = 1 if parm.replace("approval_", "") == "on" else 0
-        data[category][project_id]["approval_required"] = int(parm_state)
-        write_json_file(PATH_TO_PROJECTS_FILE, data)
+        await update_project_data(category, project_id, "approval_required", int(parm_state))
         await state.clear()
         try:
             await callback.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=await get_project_editing_kb(category=category, project_id=project_id)))
@@ -653,8 +649,7 @@ async def new_project(callback: CallbackQuery, state: FSMContext):
                 name = name[len(NON_DISPLAY_CHARACTER):]
             else:
                 name = f"{NON_DISPLAY_CHARACTER}{name}"
-            data[category][project_id]["name"] = name
-            write_json_file(PATH_TO_PROJECTS_FILE, data)
+            await update_project_data(category, project_id, "name", name)
         await state.clear()
         try:
             await callback.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=await get_project_editing_kb(category=category, project_id=project_id)))
@@ -696,23 +691,23 @@ async def handle_photos(message: Message, state: FSMContext, bot: Bot):
     file = await bot.get_file(file_id)
     file_path = file.file_path
 
-    file_extension = os.path.splitext(file_path)[1] if file_path else '.jpg'
     state_data = await state.get_data()
     category = state_data.get('category', "")
     project_id = state_data.get('project_id',"")
-    filename = f"project:::{category}:::{project_id}{file_extension}"
-    save_path = os.path.join(MEDIA_FOLDER_NAME, filename)
 
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     project_data = data[category].get(project_id, {})
     if not project_data:
-        await callback.message.edit_text("❌ Проект не найден", reply_markup=await get_back_to_main_menu_kb())
+        await message.answer("❌ Проект не найден", reply_markup=await get_back_to_main_menu_kb())
         return
 
-    data[category][project_id]["preview_photo"] = save_path
-    write_json_file(PATH_TO_PROJECTS_FILE, data)
+    saved = await save_project_photo(bot, file_path, category, project_id)
+    if not saved:
+        await message.answer("❌ Не удалось сохранить фото, попробуйте ещё раз", reply_markup=await get_back_to_project_editing_kb())
+        return
+    photo_path, thumbnail_path = saved
 
-    await bot.download_file(file_path, save_path)
+    await set_preview_photo(category, project_id, photo_path, thumbnail_path)
 
     await state.set_state(ActiveState.editing_menu_project)
     await state.update_data(category=category, project_id=project_id)
@@ -726,7 +721,7 @@ async def handle_photos(message: Message, state: FSMContext):
     project_id = state_data.get('project_id')
     project_parm = state_data.get('parm')
 
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     if not data[category].get(project_id):
         await message.answer("❌ Проект не найден", reply_markup=await get_back_to_main_menu_kb())
         return
@@ -753,8 +748,7 @@ async def handle_photos(message: Message, state: FSMContext):
             await message.answer(f"❌ В описании не может быть больше 850 символов\n\nУ Вас - {len_of_message}", reply_markup=await get_back_to_project_editing_kb())
             return
 
-    data[category][project_id][project_parm] = text
-    write_json_file(PATH_TO_PROJECTS_FILE, data)
+    await update_project_data(category, project_id, project_parm, text)
     
     await message.answer("✔️ Параметр изменен успешно", reply_markup=await get_back_to_project_editing_kb())
 
@@ -844,7 +838,7 @@ async def handle_notification_message(message: Message, state: FSMContext):
         
         await state.update_data(notification_message=notification_message)
         
-        projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+        projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         project_data = projects_data.get(category, {}).get(project_id, {})
         project_name = project_data.get("name", "Неизвестный проект")
         display_name = project_name[len(NON_DISPLAY_CHARACTER):] if project_name.startswith(NON_DISPLAY_CHARACTER) else project_name
@@ -886,7 +880,7 @@ async def send_notification(callback: CallbackQuery, state: FSMContext, bot: Bot
         category = state_data.get('project_category')
         project_id = state_data.get('project_id')
         
-        projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+        projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         project_data = projects_data.get(category, {}).get(project_id, {})
         project_name = project_data.get("name", "Неизвестный проект")
         display_name = project_name[len(NON_DISPLAY_CHARACTER):] if project_name.startswith(NON_DISPLAY_CHARACTER) else project_name
@@ -917,7 +911,7 @@ async def send_notification(callback: CallbackQuery, state: FSMContext, bot: Bot
             parse_mode="HTML"
         )
     else:
-        data = read_json_file(PATH_TO_USERS_FILE)
+        data = await read_json_file_async(PATH_TO_USERS_FILE)
         sent_to_users = 0
         for user_id in data.keys():
             if data[user_id].get("ban", 0) == 1:
@@ -1050,7 +1044,7 @@ async def approve_user_project(callback: CallbackQuery, bot: Bot):
             parse_mode="HTML"
         )
         
-        projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+        projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         project_data = projects_data.get(category, {}).get(project_id, {})
         project_name = project_data.get("name", "Без названия")
         display_name = project_name[len(NON_DISPLAY_CHARACTER):] if project_name.startswith(NON_DISPLAY_CHARACTER) else project_name
@@ -1083,7 +1077,7 @@ async def decline_user_project(callback: CallbackQuery, bot: Bot):
         parse_mode="HTML"
     )
     
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     project_data = projects_data.get(category, {}).get(project_id, {})
     project_name = project_data.get("name", "Без названия")
     display_name = project_name[len(NON_DISPLAY_CHARACTER):] if project_name.startswith(NON_DISPLAY_CHARACTER) else project_name
@@ -1101,37 +1095,9 @@ async def decline_user_project(callback: CallbackQuery, bot: Bot):
 
 async def deleting_project(category: str, project_id: str):
     try:
-        data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
-        if category not in data_pr or project_id not in data_pr[category]:
-            return {"status": False, "error": "category or project not found"}
-        
-        if data_pr[category][project_id].get("members", {}):
-            for member in data_pr[category][project_id]["members"]:
-                await removing_project_from_members(user_id=member, category=category, project_id=project_id)
-        
-        photo_path = data_pr[category][project_id].get("preview_photo")
-        if photo_path and os.path.exists(photo_path):
-            os.remove(photo_path)
-        
-        del data_pr[category][project_id]
-        write_json_file(PATH_TO_PROJECTS_FILE, data_pr)
-        return {"status": True, "error": "success"}
-    except:
-        return {"status": False, "error": "ValueError send correct values"}
-
-async def removing_project_from_members(user_id: str, category: str, project_id: str):
-    try:
-        data_us = read_json_file(PATH_TO_USERS_FILE)
-        if user_id not in data_us:
-            return {"status": False, "error": "user not found"}
-        
-        active_projects = data_us[user_id].get("active_projects", [])
-        project_value = f'{category}:::{project_id}'
-        if project_value in active_projects:
-            data_us[user_id]["active_projects"].remove(project_value)
-            data_us[user_id]["completed_projects"] = int(data_us[user_id]["completed_projects"]) + 1
-            write_json_file(PATH_TO_USERS_FILE, data_us)
-        return {"status": True, "error": "success"}
+        if await delete_project(category, project_id, completed=True):
+            return {"status": True, "error": "success"}
+        return {"status": False, "error": "category or project not found"}
     except:
         return {"status": False, "error": "ValueError send correct values"}
 
@@ -1161,11 +1127,11 @@ async def handle_photos(message: Message, state: FSMContext):
         return
     
     text = message.text
-    data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
+    data_pr = await read_json_file_async(PATH_TO_PROJECTS_FILE)
 
     if is_rewarding:
         if text.strip() == "Награда":
-            status = await give_reward_to_project_members(category=category, project_id=project_id)
+            status = await give_reward_to_project_members(category=category, project_id=project_id, moderator=str(message.from_user.id))
             if not status["status"]:
                 await message.answer("❌ Удаление прервано, не получилось наградить всех участников.")
                 if message.chat.type == "private":
@@ -1199,7 +1165,7 @@ async def handle_photos(message: Message, state: FSMContext):
     await state.clear()
 
 async def send_project_to_moderators(category: str, project_id: str, bot: Bot):
-    data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
+    data_pr = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     name_text = "🔚 Завершён:"
     prize = data_pr[category][project_id].get("prize", 0)
     from utils import format_points
@@ -1207,7 +1173,7 @@ async def send_project_to_moderators(category: str, project_id: str, bot: Bot):
     
     name = data_pr[category][project_id]["name"][len(name_text):].strip() if data_pr[category][project_id]["name"].startswith(name_text) else data_pr[category][project_id]["name"]
     
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     member_list = []
     for index, member_id in enumerate(data_pr[category][project_id].get("members", {}), 1):
         try:
@@ -1234,12 +1200,9 @@ async def send_project_to_moderators(category: str, project_id: str, bot: Bot):
         )
     else:
         try:
-            with open(photo_path, 'rb') as file:
-                photo_bytes = file.read()
-            input_file = BufferedInputFile(photo_bytes, filename=os.path.basename(photo_path))
-            await bot.send_photo(
+            await send_project_photo(
+                bot.send_photo, category, project_id, data_pr[category][project_id],
                 chat_id=MODERATORS_CHAT_ID,
-                photo=input_file,
                 caption=caption,
                 reply_markup=kb,
                 parse_mode="HTML"
@@ -2,15 +2,17 @@ import json
 import os
 import random
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command, CommandObject
 
-from config import PATH_TO_PROJECTS_FILE, PATH_TO_USERS_FILE, NON_DISPLAY_CHARACTER, MEMBERS_IN_MEMBERSLIST, MODERATORS_CHAT_ID
+from config import PATH_TO_PROJECTS_FILE, PATH_TO_USERS_FILE, NON_DISPLAY_CHARACTER, MODERATORS_CHAT_ID
 from states import ActiveState
-from utils import read_json_file, check_authorization, is_moderator
+from utils import read_json_file_async, check_authorization, is_moderator, send_project_photo
 from services import add_member_to_project, remove_member_from_project, get_project_data, get_all_projects, check_project_registration
 from keyboards import get_projects_menu_kb, generate_projects_category_menu_kb, get_back_to_main_menu_kb, get_approval_request_kb
+import listings
+import project_cards
 
 router = Router()
 
@@ -35,7 +37,8 @@ async def project_menu(callback: CallbackQuery, state: FSMContext):
     state_data = await state.get_data()
     is_editing_mode = bool(state_data.get('editing_mode', False))
         
-    data = read_json_file(PATH_TO_PROJECTS_FILE).get(category, {})
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
+    data = projects_data.get(category, {})
 
     category_names = {
         "education": "🎓 Образование и знания",
@@ -57,45 +60,10 @@ async def project_menu(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    data_projects = data.values()
-    projects_id = list(data.keys())
-    projects_name = [project["name"] for project in data_projects]
-
-    if NON_DISPLAY_CHARACTER and not is_editing_mode:
-        user_id = str(callback.from_user.id)
-        filtered_projects_name = []
-        filtered_projects_id = []
-        filtered_projects_max_members = []
-        filtered_projects_current_members = []
-        
-        for name, project_id, project in zip(projects_name, projects_id, data_projects):
-            # показывать проект если:
-            # - Он не скрыт 
-            # - Пользователь участник проекта 
-            # - Режим редактирования
-            show_project = (
-                not name.startswith(NON_DISPLAY_CHARACTER) or
-                user_id in project.get("members", {}) or
-                is_editing_mode
-            )
-            
-            if show_project:
-                display_name = name[len(NON_DISPLAY_CHARACTER):] if name.startswith(NON_DISPLAY_CHARACTER) else name
-                filtered_projects_name.append(display_name)
-                filtered_projects_id.append(project_id)
-                filtered_projects_max_members.append(project.get("max_members", 100))
-                filtered_projects_current_members.append(len(project.get("members", {})))
-        
-        projects_name = filtered_projects_name
-        projects_id = filtered_projects_id
-        projects_max_members = filtered_projects_max_members
-        projects_current_members = filtered_projects_current_members
-    else:
-        projects_max_members = [project["max_members"] for project in data_projects]
-        projects_current_members = [len(project["members"]) for project in data_projects]
-        
-    projects_members = [f"{c}/{m}" if m is not None else "" for c, m in zip(projects_current_members, projects_max_members)]
-    projects_preview = [name + " " + members for name, members in zip(projects_name, projects_members)]
+    # Скрытые проекты показываются только их участникам (и в режиме редактирования)
+    projects_preview, projects_id = listings.category_listing(
+        projects_data, category, str(callback.from_user.id), is_editing_mode=is_editing_mode
+    )
     
     if callback.message.photo:
         await callback.message.delete()
@@ -115,14 +83,12 @@ async def project_menu(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(F.data.startswith("PROJECT:::"))
 async def project_info(callback: CallbackQuery, state: FSMContext):
-    from utils import format_points, format_member_count
-    
     data_parts = callback.data.split(":::")
     category = data_parts[1]
     project_id = data_parts[2]
     user_id = str(callback.from_user.id)
 
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     data_project = data.get(category, {}).get(project_id)
 
     back_btn = [InlineKeyboardButton(text='🔙 Назад', callback_data=f"menu_project_category_{category}")]
@@ -136,54 +102,17 @@ async def project_info(callback: CallbackQuery, state: FSMContext):
         return
     
     not_unleaveable = not bool(data_project.get("unleaveable", 0))
-    name = data_project.get("name", "Без названия")
-    display_name = name[len(NON_DISPLAY_CHARACTER):] if name.startswith(NON_DISPLAY_CHARACTER) else name
-    description = data_project.get("description", "Без описания")
-    date = data_project.get("date", "Не указана")
-    prize = data_project.get("prize", "0")
-    
-    prize_points = await format_points(int(prize))
-    
     current_mem = len(data_project.get("members", {}))
     max_mem = data_project.get("max_members", 1000)
-    url = data_project.get("url")
     photo_path = data_project.get('preview_photo')
 
     is_member = user_id in data_project.get("members", {})
 
-    data_users = read_json_file(PATH_TO_USERS_FILE)
-    member_list = []
-    if is_member:
-        member_list.append(f"1. {data_users.get(user_id, {}).get('name')} {data_users.get(user_id, {}).get('surname')}")
-    
-    for member_id in data_project.get("members", {}):
-        if user_id != member_id:
-            try:
-                member_data = data_users.get(member_id, {})
-                member_list.append(f"{len(member_list)+1}. {member_data.get('name')} {member_data.get('surname')}")
-            except:
-                member_list.append(f"{len(member_list)+1}. Участник не найден")
-
-    many_members = len(member_list) > MEMBERS_IN_MEMBERSLIST
-    if many_members:
-        len_mem_list = len(member_list) - MEMBERS_IN_MEMBERSLIST
-        member_list = member_list[:MEMBERS_IN_MEMBERSLIST]
-        more_members = await format_member_count(len_mem_list)
-        member_list.append(f"\n... и еще {more_members} ...")
-    
-    members = "\n".join(member_list)
-
-    project_info = (
-        f"<b>{display_name}</b>\n\n"
-        f"{description}\n\n"
-        f"🗓️ <b>Сроки: до {date}</b>\n"
-        f"⭐️ <b>Награда: {prize_points}</b>\n" 
-        f"👤 <b>Участники: {current_mem}/{max_mem}</b>\n"
-        f"{members}"
-    )
-    
-    if url:
-        project_info += f"\n\n<a href='{url}'>Перейти к проекту</a>"
+    # Общая для всех часть карточки - из кэша, список участников - с зрителем первым
+    data_users = await read_json_file_async(PATH_TO_USERS_FILE)
+    card = await project_cards.get_card(data, data_users, category, project_id)
+    many_members = card.many_members
+    project_info = card.text(user_id, data_users)
 
     kb = []
 
@@ -239,11 +168,8 @@ async def project_info(callback: CallbackQuery, state: FSMContext):
     
     if photo_path:
         try:
-            with open(photo_path, 'rb') as file:
-                photo_bytes = file.read()
-            input_file = BufferedInputFile(photo_bytes, filename=photo_path)
-            await callback.message.answer_photo(
-                photo=input_file,
+            await send_project_photo(
+                callback.message.answer_photo, category, project_id, data_project,
                 caption=project_info,
                 reply_markup=kb_end,
                 parse_mode="HTML"
@@ -269,8 +195,8 @@ async def request_join_project(callback: CallbackQuery, state: FSMContext, bot:
     category = data_parts[2]
     project_id = data_parts[3]
     
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     
     project_data = projects_data.get(category, {}).get(project_id, {})
     user_data = users_data.get(user_id, {})
@@ -326,7 +252,7 @@ async def project_full_members_list(callback: CallbackQuery, state: FSMContext):
     project_id = data_parts[2]
     user_id = str(callback.from_user.id)
 
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
+    data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     data_project = data.get(category,{}).get(project_id)
     if not data_project:
         await callback.message.delete()
@@ -340,7 +266,7 @@ async def project_full_members_list(callback: CallbackQuery, state: FSMContext):
     current_mem = len(data_project.get("members", {})) 
     max_mem = data_project.get("max_members", "Нет ограничения")
     is_member = user_id in data_project.get("members", {})
-    data_users = read_json_file(PATH_TO_USERS_FILE)
+    data_users = await read_json_file_async(PATH_TO_USERS_FILE)
     member_list = []
     if is_member:
         member_list.append(f"1. {data_users.get(user_id, {}).get('name')} {data_users.get(user_id, {}).get('surname')}")
@@ -455,7 +381,7 @@ async def add_random_members_start(callback: CallbackQuery, state: FSMContext):
     category = data_parts[1]
     project_id = data_parts[2]
     
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     project_data = projects_data.get(category, {}).get(project_id, {})
     
     if not project_data:
@@ -552,8 +478,8 @@ async def handle_random_members_count(message: Message, state: FSMContext):
     )
 
 async def generate_random_candidates(category: str, project_id: str, count: int):
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     
     project_members = projects_data.get(category, {}).get(project_id, {}).get("members", {})
     
@@ -7,8 +7,9 @@ from aiogram.fsm.context import FSMContext
 
 from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, MODERATORS_CHAT_ID, REWARD_COEFFICIENT_FOR_THE_PHOTO
 from states import ActiveState
-from utils import read_json_file, check_authorization
-from services import check_project_registration, get_user_data, get_project_data, add_points_to_member
+from utils import read_json_file_async, check_authorization
+from services import check_project_registration, get_user_data, get_project_data, award_points
+from ledger import PHOTO_REPORT
 from keyboards import get_report_menu_kb, get_back_to_report_menu_kb, get_back_to_main_menu_kb
 
 router = Router()
@@ -37,9 +38,9 @@ async def report_progress(callback: CallbackQuery, state: FSMContext):
         )        
         return 
     
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = users_data.get(user_id, {})
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     
     if not user_data:
         return
@@ -78,7 +79,7 @@ async def report_progress(callback: CallbackQuery, state: FSMContext):
         data_parts = callback.data.split(":::")
         category = data_parts[1]
         project_id = data_parts[2]
-        projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+        projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         data_project = projects_data.get(category, {}).get(project_id)
         if not data_project:
             return
@@ -109,7 +110,7 @@ async def handle_photos(message: Message, state: FSMContext, bot: Bot):
     project_name = data.get("reporting_project", False)
     project_prize = data.get("reporting_project_prize", False)
 
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = users_data.get(str(user.id), {})
     
     if not user_data:
@@ -172,7 +173,7 @@ async def reward_member(callback: CallbackQuery):
     user_id = data_parts[1]
     points = data_parts[2]
     await callback.message.edit_reply_markup(reply_markup=None)
-    await add_points_to_member(user_id=user_id, points=points)
+    await award_points([user_id], points, reason=PHOTO_REPORT, moderator=str(callback.from_user.id))
 
 @router.callback_query(F.data == "send_message_to_moderators")
 async def report_progress(callback: CallbackQuery, state: FSMContext):
@@ -219,7 +220,7 @@ async def report(message: Message, state: FSMContext):
 @router.message(ActiveState.waiting_for_message_to_mods, F.text)
 async def handle_photos(message: Message, state: FSMContext, bot: Bot):
     user = message.from_user
-    users_data = read_json_file(PATH_TO_USERS_FILE)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = users_data.get(str(user.id), {})
 
     if not user_data:
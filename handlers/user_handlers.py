@@ -6,9 +6,9 @@ from aiogram.fsm.context import FSMContext
 
 from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, MEMBERS_IN_MEMBERSLIST, USER_IN_LEADERBOARD, NON_DISPLAY_CHARACTER
 from states import ActiveState
-from utils import read_json_file, check_authorization, is_moderator, phone_number_validating, send_not_moderator, get_leaderboard
+from utils import read_json_file_async, check_authorization, is_moderator, phone_number_validating, send_not_moderator, get_leaderboard_page, get_leaderboard_around
 from services import get_user_data, update_user_data, get_leaderboard_data
-from keyboards import get_main_menu_kb, get_my_data_menu_kb, get_back_to_main_menu_kb
+from keyboards import get_main_menu_kb, get_my_data_menu_kb, get_back_to_main_menu_kb, get_leaderboard_kb
 
 router = Router()
 
@@ -24,7 +24,7 @@ async def my_data_menu(callback: CallbackQuery, state: FSMContext):
         return
 
     await state.clear()
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_id = callback.from_user.id
     user_data = data[str(user_id)]
     
@@ -35,7 +35,7 @@ async def my_data_menu(callback: CallbackQuery, state: FSMContext):
         active_projects = "Нет"
     else:
         active_projects = "\n"
-        data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
+        data_pr = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         for index, project in enumerate(user_data["active_projects"], 1):
             category, project_id = project.split(":::")
             project_name = f'{index}. {data_pr.get(category, {}).get(project_id, {}).get("name", "Не найден")}\n'
@@ -58,7 +58,7 @@ async def my_data_menu(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "menu_my_data_edit")
 async def menu_my_data_edit(callback: CallbackQuery, state: FSMContext):
     await state.set_state(ActiveState.my_data_edit)
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_id = str(callback.from_user.id)
     user_data = data[user_id]
 
@@ -168,8 +168,12 @@ async def my_data_parm_editing(message: Message, state: FSMContext):
                 return
             new_value = int(new_value)
 
-        from services import update_user_data
-        success = await update_user_data(user_id, parm, new_value)
+        if parm == "score":
+            from services import set_points
+            success = await set_points(user_id, new_value, moderator=str(message.from_user.id))
+        else:
+            from services import update_user_data
+            success = await update_user_data(user_id, parm, new_value)
         
         if success:
             await state.clear()
@@ -179,22 +183,38 @@ async def my_data_parm_editing(message: Message, state: FSMContext):
 
 @router.callback_query(F.data == "menu_leaderboard")
 async def leaderboard_menu(callback: CallbackQuery, state: FSMContext):
+    await show_leaderboard(callback, page=0)
+
+@router.callback_query(F.data.startswith("LEADERBOARD_PAGE:::"))
+async def leaderboard_page(callback: CallbackQuery, state: FSMContext):
+    page = callback.data.split(":::")[1]
+    await show_leaderboard(callback, page=int(page) if page.isdigit() else 0)
+
+@router.callback_query(F.data == "LEADERBOARD_AROUND")
+async def leaderboard_around(callback: CallbackQuery, state: FSMContext):
+    await show_leaderboard(callback, around=True)
+
+async def show_leaderboard(callback: CallbackQuery, page: int = 0, around: bool = False):
     user_id =  str(callback.from_user.id)
-    leaderboard_data, user_rank = await get_leaderboard(user_id= user_id, top_n= USER_IN_LEADERBOARD) 
+    if around:
+        leaderboard, user_rank, page, pages = await get_leaderboard_around(user_id, USER_IN_LEADERBOARD)
+    else:
+        leaderboard, user_rank, page, pages = await get_leaderboard_page(user_id, page, USER_IN_LEADERBOARD)
     
     if user_rank:
         your_place = f"Ваше место в списке - {user_rank}\n\n"
     else:
         your_place =""
-    leaderboard = '\n'.join(leaderboard_data)
+    page_info = f"Страница {page + 1} из {pages}\n\n" if pages > 1 and not around else ""
     text =  (
         "🏆 <b>Таблица лидеров по баллам ⭐️</b>\n\n"
         f"{your_place}"
+        f"{page_info}"
         f"{leaderboard}"
     )
     await callback.message.edit_text(
         text,
-        reply_markup = await get_back_to_main_menu_kb(),
+        reply_markup = await get_leaderboard_kb(page, pages, show_around=bool(user_rank) and not around),
         parse_mode = "HTML"
     )
 
@@ -204,7 +224,7 @@ async def all_users(message: Message):
         await send_not_moderator(message)
         return
 
-    data_us = read_json_file(PATH_TO_USERS_FILE)
+    data_us = await read_json_file_async(PATH_TO_USERS_FILE)
     text = f'Всего пользователей: {len(data_us)}\n\n'
     for index, user in enumerate(data_us, 1):
         name = f'{index} {data_us[user].get("name")} {data_us[user].get("surname")} ID: <code>{user}</code>\n'
@@ -260,7 +280,7 @@ async def my_data_edit_parms(callback: CallbackQuery, state: FSMContext):
     await editing_user_parms(message=callback.message, user_id=user_id)
 
 async def editing_user_parms(message, user_id: str, update_message: bool = None):
-    user_data = read_json_file(PATH_TO_USERS_FILE).get(str(user_id), False)
+    user_data = (await read_json_file_async(PATH_TO_USERS_FILE)).get(str(user_id), False)
     if not user_data:
         await message.answer("❌ Пользователь с таким ID не найден❌", reply_markup=await get_back_to_main_menu_kb())
         return
@@ -288,7 +308,7 @@ async def editing_user_parms(message, user_id: str, update_message: bool = None)
         active_projects = "Нет"
     else:
         active_projects = "\n"
-        data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
+        data_pr = await read_json_file_async(PATH_TO_PROJECTS_FILE)
         for index, project in enumerate(user_data["active_projects"], 1):
             category, project_id = project.split(":::")
             project_name = f'{index}. {data_pr.get(category, {}).get(project_id, {}).get("name", "Не найден")}\n'
@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 import sys
 from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, MEDIA_FOLDER_NAME
@@ -38,56 +37,139 @@ def check_config():
     logging.info("✅ Конфигурационный файл проверен успешно")
     return True
 
-def check_data_files():
-    """Проверяет наличие и корректность файлов данных"""
+def check_database():
+    """Проверяет базу данных SQLite (STORAGE_BACKEND = "sqlite")"""
+    try:
+        from sqlite_storage import counts, PATH_TO_DATABASE_FILE
+        users, projects = counts()
+        logging.info(f"✅ База данных проверена: {PATH_TO_DATABASE_FILE}, {users} пользователей, {projects} проектов")
+        if not users and not projects and (os.path.exists(PATH_TO_USERS_FILE) or os.path.exists(PATH_TO_PROJECTS_FILE)):
+            logging.warning("📁 База пуста, а JSON файлы найдены. Для переноса данных запустите: python sqlite_storage.py")
+        return True
+    except Exception as e:
+        logging.error(f"❌ Ошибка открытия базы данных: {e}")
+        return False
+
+def check_sharded_files():
+    """Проверяет папку с файлами пользователей и проектов (STORAGE_BACKEND = "sharded")"""
+    try:
+        from sharded_storage import counts, read_manifest, PATH_TO_DATA_FOLDER
+        if not read_manifest():
+            logging.warning(f"📁 Создаю папку данных: {PATH_TO_DATA_FOLDER}")
+            if os.path.exists(PATH_TO_USERS_FILE) or os.path.exists(PATH_TO_PROJECTS_FILE):
+                logging.warning("📁 Найдены JSON файлы. Для переноса данных запустите: python sharded_storage.py")
+            from sharded_storage import replace_all
+            if not replace_all(PATH_TO_PROJECTS_FILE, {}):
+                return False
+        users, projects = counts()
+        logging.info(f"✅ Папка данных проверена: {PATH_TO_DATA_FOLDER}, {users} пользователей, {projects} проектов")
+        return True
+    except Exception as e:
+        logging.error(f"❌ Ошибка чтения папки данных: {e}")
+        return False
+
+def replay_journals():
+    """Применяет журнал изменений, оставшийся с прошлого запуска, к снимку данных"""
+    import journal
+    from utils import compact_journal
+    from services import PATH_TO_PROJECT_IDS_FILE
+    for file_path in (PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, PATH_TO_PROJECT_IDS_FILE):
+        if journal.exists(file_path):
+            logging.info(f"📝 Применяю журнал изменений: {journal.journal_path(file_path)}")
+            if not compact_journal(file_path):
+                logging.error(f"❌ Ошибка применения журнала изменений: {file_path}")
+                return False
+    return True
+
+def read_data_file(file_path):
+    """Читает файл данных в любом поддерживаемом формате и переводит его в формат из config"""
+    import serializers
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        data = serializers.loads(raw)
+    except (ValueError, OSError):
+        return None
+    
+    if not serializers.matches_config(raw):
+        data_format, compression = serializers.detect(raw)
+        logging.info(f"📝 Файл {file_path} в формате {data_format}/{compression}, перевожу в формат из config")
+        from utils import write_json_file
+        if not write_json_file(file_path, data):
+            return None
+    return data
+
+def check_json_files():
+    """Проверяет наличие и корректность JSON файлов данных"""
+    if not replay_journals():
+        return False
     # Проверяем файл пользователей
     if not os.path.exists(PATH_TO_USERS_FILE):
         logging.warning(f"📁 Создаю файл пользователей: {PATH_TO_USERS_FILE}")
         try:
-            with open(PATH_TO_USERS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=4)
+            import serializers
+            with open(PATH_TO_USERS_FILE, 'wb') as f:
+                f.write(serializers.dumps({}))
         except Exception as e:
             logging.error(f"❌ Ошибка создания файла пользователей: {e}")
             return False
     else:
-        # Проверяем что файл валидный JSON
-        try:
-            with open(PATH_TO_USERS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            logging.info(f"✅ Файл пользователей проверен: {len(data)} пользователей")
-        except json.JSONDecodeError:
+        # Проверяем что файл читается (формат определяется автоматически)
+        data = read_data_file(PATH_TO_USERS_FILE)
+        if data is None:
             logging.error(f"❌ Файл пользователей поврежден: {PATH_TO_USERS_FILE}")
             return False
+        logging.info(f"✅ Файл пользователей проверен: {len(data)} пользователей")
     
     # Проверяем файл проектов
     if not os.path.exists(PATH_TO_PROJECTS_FILE):
         logging.warning(f"📁 Создаю файл проектов: {PATH_TO_PROJECTS_FILE}")
         try:
-            with open(PATH_TO_PROJECTS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({
-                            "education": {},
-                            "science": {},
-                            "profession": {},
-                            "culture": {},
-                            "volunteering": {},
-                            "patriotism": {},
-                            "sport": {},
-                            "other": {}
-                        },
-                        f, ensure_ascii=False, indent=4)
+            import serializers
+            from store import CATEGORIES
+            with open(PATH_TO_PROJECTS_FILE, 'wb') as f:
+                f.write(serializers.dumps({category: {} for category in CATEGORIES}))
         except Exception as e:
             logging.error(f"❌ Ошибка создания файла проектов: {e}")
             return False
     else:
-        # Проверяем что файл валидный JSON
-        try:
-            with open(PATH_TO_PROJECTS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            project_count = sum(len(projects) for projects in data.values())
-            logging.info(f"✅ Файл проектов проверен: {project_count} проектов")
-        except json.JSONDecodeError:
+        # Проверяем что файл читается (формат определяется автоматически)
+        data = read_data_file(PATH_TO_PROJECTS_FILE)
+        if data is None:
             logging.error(f"❌ Файл проектов поврежден: {PATH_TO_PROJECTS_FILE}")
             return False
+        project_count = sum(len(projects) for projects in data.values())
+        logging.info(f"✅ Файл проектов проверен: {project_count} проектов")
+    
+    return True
+
+def check_ledger_file():
+    """Проверяет журнал начислений; при первом запуске записывает в него текущие баллы"""
+    import ledger
+    from utils import read_json_file
+    if os.path.exists(ledger.PATH_TO_LEDGER_FILE):
+        logging.info(f"✅ Журнал начислений проверен: {ledger.PATH_TO_LEDGER_FILE}")
+        return True
+    
+    logging.warning(f"📁 Создаю журнал начислений: {ledger.PATH_TO_LEDGER_FILE}")
+    if not ledger.create(read_json_file(PATH_TO_USERS_FILE)):
+        return False
+    return True
+
+def check_data_files():
+    """Проверяет наличие и корректность файлов данных"""
+    from utils import STORAGE_BACKEND
+    if STORAGE_BACKEND == "sqlite":
+        if not check_database():
+            return False
+    elif STORAGE_BACKEND == "sharded":
+        if not check_sharded_files():
+            return False
+    elif not check_json_files():
+        return False
+    
+    if not check_ledger_file():
+        return False
     
     # Проверяем папку для медиа
     if not os.path.exists(MEDIA_FOLDER_NAME):
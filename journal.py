@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Количество записей в журнале и время первой несжатой записи для каждого файла
+_pending_records: Dict[str, int] = {}
+_pending_since: Dict[str, float] = {}
+
+def journal_path(file_path: str) -> str:
+    """Путь к журналу изменений файла данных"""
+    return file_path + ".log"
+
+def append(file_path: str, changes: List[Any]) -> bool:
+    """Дописать изменения (op, path, value) в журнал, по одной строке на изменение"""
+    lines = "".join(json.dumps([op, list(path), value], ensure_ascii=False) + "\n" for op, path, value in changes)
+    try:
+        with open(journal_path(file_path), 'a', encoding='utf-8') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+    except OSError as e:
+        logger.error(f"❌ Ошибка записи в журнал {journal_path(file_path)}: {e}")
+        return False
+
+    if not _pending_records.get(file_path):
+        _pending_since[file_path] = time.monotonic()
+    _pending_records[file_path] = _pending_records.get(file_path, 0) + len(changes)
+    return True
+
+def compacting_path(file_path: str) -> str:
+    """Путь к части журнала, которая сейчас переносится в снимок"""
+    return journal_path(file_path) + ".compacting"
+
+def _read_lines(path: str, changes: List[Any]):
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                op, change_path, value = json.loads(line)
+            except ValueError:
+                logger.warning(f"⚠️ Пропущена повреждённая запись журнала {path}")
+                continue
+            changes.append((op, tuple(change_path), value))
+
+def read(file_path: str) -> List[Any]:
+    """Прочитать все изменения из журнала (оборванная последняя строка пропускается)"""
+    changes = []
+    _read_lines(compacting_path(file_path), changes)
+    _read_lines(journal_path(file_path), changes)
+    _pending_records[file_path] = len(changes)
+    if changes and file_path not in _pending_since:
+        _pending_since[file_path] = time.monotonic()
+    return changes
+
+def begin_compaction(file_path: str):
+    """Отложить текущий журнал перед сериализацией снимка.
+
+    Снимок пишется в фоне, и новые изменения в это время должны попасть
+    в свежий журнал, а не пропасть вместе со старым."""
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return
+    compacting = compacting_path(file_path)
+    try:
+        if os.path.exists(compacting):
+            # Прошлое сжатие не удалось - дописываем журнал к ожидающей части
+            with open(path, 'r', encoding='utf-8') as src, open(compacting, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(path)
+        else:
+            os.replace(path, compacting)
+    except OSError as e:
+        logger.error(f"❌ Ошибка ротации журнала {path}: {e}")
+        return
+    _pending_records.pop(file_path, None)
+    _pending_since.pop(file_path, None)
+
+def end_compaction(file_path: str):
+    """Удалить отложенную часть журнала после записи снимка"""
+    try:
+        os.remove(compacting_path(file_path))
+    except FileNotFoundError:
+        pass
+
+def clear(file_path: str):
+    """Очистить журнал после записи полного снимка"""
+    for path in (journal_path(file_path), compacting_path(file_path)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    _pending_records.pop(file_path, None)
+    _pending_since.pop(file_path, None)
+
+def exists(file_path: str) -> bool:
+    return os.path.exists(journal_path(file_path)) or os.path.exists(compacting_path(file_path))
+
+def pending_files() -> List[str]:
+    """Файлы данных, у которых в журнале есть несжатые записи"""
+    return [file_path for file_path, records in list(_pending_records.items()) if records]
+
+def needs_compaction(file_path: str, max_records: int, max_seconds: float) -> bool:
+    """Пора ли сжать журнал в файл данных"""
+    records = _pending_records.get(file_path, 0)
+    if not records:
+        return False
+    return records >= max_records or time.monotonic() - _pending_since.get(file_path, 0) >= max_seconds
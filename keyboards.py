@@ -1,7 +1,36 @@
+from functools import lru_cache, wraps
+from typing import Callable, Dict
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import NON_DISPLAY_CHARACTER
 
-async def get_main_menu_kb():
+# Клавиатуры без параметров строятся один раз (warm_up() при запуске) и переиспользуются,
+# клавиатуры с параметрами кэшируются по параметрам (lru_cache).
+# Готовые клавиатуры общие для всех сообщений - их нельзя изменять.
+
+_static_builders: Dict[str, Callable[[], InlineKeyboardMarkup]] = {}
+_static_keyboards: Dict[str, InlineKeyboardMarkup] = {}
+
+def static_keyboard(build: Callable[[], InlineKeyboardMarkup]):
+    """Зарегистрировать неизменяемую клавиатуру: `await get_..._kb()` отдаёт один и тот же объект"""
+    name = build.__name__
+    _static_builders[name] = build
+
+    @wraps(build)
+    async def get_keyboard():
+        keyboard = _static_keyboards.get(name)
+        if keyboard is None:
+            keyboard = _static_keyboards[name] = build()
+        return keyboard
+    return get_keyboard
+
+def warm_up():
+    """Построить все неизменяемые клавиатуры заранее"""
+    for name, build in _static_builders.items():
+        if name not in _static_keyboards:
+            _static_keyboards[name] = build()
+
+@static_keyboard
+def get_main_menu_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='1️⃣ Активности', callback_data="menu_projects")],
@@ -11,26 +40,53 @@ async def get_main_menu_kb():
         ]
     )
 
-async def get_back_to_main_menu_kb():
+@static_keyboard
+def get_back_to_main_menu_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='🔙 В главное меню.', callback_data="back_to_main")]
         ]
     )
 
+async def get_leaderboard_kb(page: int, pages: int, show_around: bool = True):
+    return _leaderboard_kb(page, pages, show_around)
+
+@lru_cache(maxsize=256)
+def _leaderboard_kb(page: int, pages: int, show_around: bool):
+    kb = []
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text='⬅️', callback_data=f"LEADERBOARD_PAGE:::{page - 1}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton(text='➡️', callback_data=f"LEADERBOARD_PAGE:::{page + 1}"))
+    if navigation:
+        kb.append(navigation)
+    if show_around:
+        kb.append([InlineKeyboardButton(text='📍 Моё место', callback_data="LEADERBOARD_AROUND")])
+    elif page > 0:
+        kb.append([InlineKeyboardButton(text='🏆 К началу', callback_data="LEADERBOARD_PAGE:::0")])
+    kb.append([InlineKeyboardButton(text='🔙 В главное меню.', callback_data="back_to_main")])
+
+    return InlineKeyboardMarkup(inline_keyboard=kb)
+
 async def get_my_data_menu_kb(user_id: str = None):
-    from utils import read_json_file
+    from utils import read_json_file_async
     from config import PATH_TO_USERS_FILE
 
-    
-    kb = []
+    confirm_phone = False
     if user_id:
-        users_data = read_json_file(PATH_TO_USERS_FILE)
+        users_data = await read_json_file_async(PATH_TO_USERS_FILE)
         user_data = users_data.get(str(user_id), {})
         phone = user_data.get("phone", "Не указано")
-        
-        if phone.startswith(NON_DISPLAY_CHARACTER):
-            kb.append([InlineKeyboardButton(text='✅ Подтвердить телефон', callback_data="confirm_phone_main")])
+        confirm_phone = phone.startswith(NON_DISPLAY_CHARACTER)
+
+    return _my_data_menu_kb(confirm_phone)
+
+@lru_cache(maxsize=None)
+def _my_data_menu_kb(confirm_phone: bool):
+    kb = []
+    if confirm_phone:
+        kb.append([InlineKeyboardButton(text='✅ Подтвердить телефон', callback_data="confirm_phone_main")])
     kb.extend([
         [InlineKeyboardButton(text='✏️ Редактировать', callback_data="menu_my_data_edit")],
         [InlineKeyboardButton(text='🔙 Назад', callback_data="back_to_main")]
@@ -38,7 +94,8 @@ async def get_my_data_menu_kb(user_id: str = None):
 
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
-async def get_projects_menu_kb():
+@static_keyboard
+def get_projects_menu_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='🎓 Образование и знания', callback_data="menu_project_category_education")],
@@ -77,7 +134,8 @@ async def generate_projects_category_menu_kb(projects_preview, projects_id, cate
 
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
-async def get_report_menu_kb():
+@static_keyboard
+def get_report_menu_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='📷 Отправить фото о проекте', callback_data="send_report_progress")],
@@ -86,14 +144,16 @@ async def get_report_menu_kb():
         ]
     )
 
-async def get_back_to_report_menu_kb():
+@static_keyboard
+def get_back_to_report_menu_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='🔙 Назад', callback_data="menu_report")]
         ]
     )
 
-async def get_adding_projects_md_kb():
+@static_keyboard
+def get_adding_projects_md_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='🎓 Образование и знания', callback_data="adding_project_category_education")],
@@ -108,7 +168,8 @@ async def get_adding_projects_md_kb():
         ]
     )
 
-async def get_back_to_project_editing_kb():
+@static_keyboard
+def get_back_to_project_editing_kb():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text='В меню редактирования', callback_data="back_to_project_editing")]
@@ -117,6 +178,10 @@ async def get_back_to_project_editing_kb():
 
 async def get_approval_request_kb(user_id: str, category: str, project_id: str):
     """Клавиатура для запроса одобрения участия в проекте"""
+    return _approval_request_kb(str(user_id), category, project_id)
+
+@lru_cache(maxsize=1024)
+def _approval_request_kb(user_id: str, category: str, project_id: str):
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
@@ -132,7 +197,8 @@ async def get_approval_request_kb(user_id: str, category: str, project_id: str):
         ]
     )
 
-async def get_consent_keyboard():
+@static_keyboard
+def get_consent_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
@@ -0,0 +1,210 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Tuple
+import config
+from config import PATH_TO_USERS_FILE, USER_IN_LEADERBOARD
+from utils import SnapshotIndex
+
+# Рейтинг пользователей по баллам: отсортированные ключи (-score, user_id).
+# Пользователи с равными баллами идут по user_id, группы с равными баллами
+# оформляет utils.format_group.
+# version() растёт, только когда меняется видимая часть рейтинга (первые
+# USER_IN_LEADERBOARD мест и следующее за ними): по ней кэшируется готовый текст топа.
+
+# Сколько мест выше и ниже пользователя показывает "Моё место"
+AROUND_RANKS = getattr(config, "LEADERBOARD_AROUND_RANKS", 5)
+
+class _SortedKeys:
+    """Отсортированный список, разбитый на части не длиннее 2 * LOAD.
+
+    Часть находится двоичным поиском по максимумам частей, позиция части -
+    деревом Фенвика по их длинам, поэтому вставка, удаление, место ключа и
+    ключ по месту стоят O(log n) плюс сдвиг внутри части ограниченной длины."""
+    LOAD = 256
+
+    def __init__(self, keys=()):
+        self._parts: List[list] = []
+        self._maxes: list = []
+        self._tree: List[int] = []
+        self._size = 0
+        self._build(sorted(keys))
+
+    def _build(self, keys: list):
+        self._parts = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [part[-1] for part in self._parts]
+        self._size = len(keys)
+        self._index_parts()
+
+    def _index_parts(self):
+        tree = [0] * (len(self._parts) + 1)
+        for i, part in enumerate(self._parts, 1):
+            tree[i] += len(part)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _resize(self, part_index: int, delta: int):
+        i = part_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+        self._size += delta
+
+    def _before(self, part_index: int) -> int:
+        """Сколько ключей в частях перед part_index"""
+        total, i = 0, part_index
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, position: int) -> Tuple[int, int]:
+        """Часть и место в ней для позиции position (0 <= position < len)"""
+        part_index, step = 0, 1 << len(self._tree).bit_length()
+        while step:
+            nxt = part_index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                part_index = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return part_index, position
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key):
+        if not self._parts:
+            self._build([key])
+            return
+        i = min(bisect_left(self._maxes, key), len(self._parts) - 1)
+        part = self._parts[i]
+        insort(part, key)
+        self._maxes[i] = part[-1]
+        if len(part) > 2 * self.LOAD:
+            self._parts[i:i + 1] = [part[:self.LOAD], part[self.LOAD:]]
+            self._maxes[i:i + 1] = [part[self.LOAD - 1], part[-1]]
+            self._size += 1
+            self._index_parts()
+        else:
+            self._resize(i, 1)
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._parts):
+            return
+        part = self._parts[i]
+        j = bisect_left(part, key)
+        if j == len(part) or part[j] != key:
+            return
+        del part[j]
+        if part:
+            self._maxes[i] = part[-1]
+            self._resize(i, -1)
+        else:
+            del self._parts[i], self._maxes[i]
+            self._size -= 1
+            self._index_parts()
+
+    def index(self, key) -> int:
+        """Сколько ключей меньше key"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._parts):
+            return self._size
+        return self._before(i) + bisect_left(self._parts[i], key)
+
+    def slice(self, start: int, stop: int) -> list:
+        """Ключи с позиции start до stop"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        part_index, offset = self._find(start)
+        result = []
+        while len(result) < stop - start:
+            result.extend(self._parts[part_index][offset:offset + stop - start - len(result)])
+            part_index, offset = part_index + 1, 0
+        return result
+
+_keys = _SortedKeys()
+_scores: Dict[str, int] = {}
+_version = 0
+# Поля, из которых складывается имя в рейтинге
+DISPLAY_FIELDS = ("name", "surname", "username")
+
+def _score(user_data: Dict[str, Any]) -> int:
+    try:
+        return int(user_data.get("score", 0))
+    except (TypeError, ValueError):
+        return 0
+
+def _position(user_id: str) -> Optional[int]:
+    score = _scores.get(user_id)
+    if score is None:
+        return None
+    return _keys.index((-score, user_id))
+
+def _visible(position: Optional[int]) -> bool:
+    return position is not None and position <= USER_IN_LEADERBOARD
+
+def _remove(user_id: str):
+    score = _scores.pop(user_id, None)
+    if score is not None:
+        _keys.remove((-score, user_id))
+
+def _put(users_data: Dict[str, Any], user_id: str):
+    user_data = users_data.get(user_id)
+    if not isinstance(user_data, dict):
+        _remove(user_id)
+        return
+    score = _score(user_data)
+    if _scores.get(user_id) == score:
+        return
+    _remove(user_id)
+    _scores[user_id] = score
+    _keys.add((-score, user_id))
+
+def _rebuild(users_data: Dict[str, Any]):
+    global _keys, _version
+    _scores.clear()
+    for user_id, user_data in users_data.items():
+        if isinstance(user_data, dict):
+            _scores[user_id] = _score(user_data)
+    _keys = _SortedKeys((-score, user_id) for user_id, score in _scores.items())
+    _version += 1
+
+def _apply(snapshot: Dict[str, Any], changes):
+    global _version
+    touched = {path[0] for _, path, _ in changes if len(path) == 1 or path[1] == "score" or path[1] in DISPLAY_FIELDS}
+    for user_id in touched:
+        visible = _visible(_position(user_id))
+        _put(snapshot, user_id)
+        if visible or _visible(_position(user_id)):
+            _version += 1
+
+_ensure = SnapshotIndex(PATH_TO_USERS_FILE, _rebuild, _apply).ensure
+
+def version(users_data: Dict[str, Any]) -> int:
+    """Версия видимой части рейтинга"""
+    _ensure(users_data)
+    return _version
+
+def rank_of(users_data: Dict[str, Any], user_id: str) -> Optional[int]:
+    """Место пользователя в рейтинге (с 1) или None"""
+    _ensure(users_data)
+    position = _position(str(user_id))
+    return None if position is None else position + 1
+
+def top(users_data: Dict[str, Any], count: Optional[int] = None) -> List[Tuple[str, int]]:
+    """Первые count мест рейтинга: [(user_id, score), ...]"""
+    _ensure(users_data)
+    keys = _keys.slice(0, len(_keys) if count is None else count)
+    return [(user_id, -score) for score, user_id in keys]
+
+def page(users_data: Dict[str, Any], start: int, count: int) -> List[Tuple[str, int]]:
+    """count мест рейтинга, начиная с позиции start (с 0): [(user_id, score), ...]"""
+    _ensure(users_data)
+    return [(user_id, -score) for score, user_id in _keys.slice(start, max(start, 0) + count)]
+
+def size(users_data: Dict[str, Any]) -> int:
+    """Число пользователей в рейтинге"""
+    _ensure(users_data)
+    return len(_keys)
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+import config
+from config import PATH_TO_USERS_FILE
+
+logger = logging.getLogger(__name__)
+
+# Журнал начислений баллов: каждая строка - одно начисление, поля через табуляцию:
+# время (unix), TG ID, изменение баллов, причина, проект (category:::project_id), модератор.
+# Файл только дописывается. Поле score в users - итог по журналу; при расхождении
+# его можно пересчитать: python ledger.py rebuild
+# Запись с причиной removal (удаление пользователя) обнуляет итог: при повторной
+# регистрации с тем же TG ID старые баллы не возвращаются.
+PATH_TO_LEDGER_FILE = getattr(config, "PATH_TO_LEDGER_FILE",
+                              os.path.join(os.path.dirname(PATH_TO_USERS_FILE), "ledger.tsv"))
+
+# Причины начислений
+OPENING_BALANCE = "opening_balance"
+PROJECT_REWARD = "project_reward"
+PHOTO_REPORT = "photo_report"
+CORRECTION = "correction"
+REMOVAL = "removal"
+
+Entry = Tuple[str, int, str, Optional[str], Optional[str]]  # (user_id, delta, reason, project, moderator)
+
+def _field(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+def format_entries(entries: Iterable[Entry], timestamp: int = None) -> str:
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return "".join(
+        f"{timestamp}\t{_field(user_id)}\t{int(delta)}\t{_field(reason)}\t{_field(project)}\t{_field(moderator)}\n"
+        for user_id, delta, reason, project, moderator in entries
+    )
+
+def _append(text: str) -> bool:
+    try:
+        with open(PATH_TO_LEDGER_FILE, 'a', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+    except OSError as e:
+        logger.error(f"❌ Ошибка записи в журнал начислений {PATH_TO_LEDGER_FILE}: {e}")
+        return False
+    return True
+
+async def record(entries: List[Entry]) -> bool:
+    """Дописать начисления в журнал (в потоке хранилища)"""
+    if not entries:
+        return True
+    from utils import run_in_storage_thread
+    return await run_in_storage_thread(_append, format_entries(entries))
+
+def stored_score(user_data: Dict) -> Optional[int]:
+    """score пользователя числом (в старых users.json встречаются строки); None - не число"""
+    try:
+        return int(user_data.get("score", 0))
+    except (TypeError, ValueError):
+        return None
+
+def create(users_data: Dict[str, Dict]) -> bool:
+    """Создать журнал с начальными остатками - текущими баллами пользователей"""
+    entries = []
+    for user_id, user_data in users_data.items():
+        score = stored_score(user_data)
+        if score:
+            entries.append((user_id, score, OPENING_BALANCE, None, None))
+    return _append(format_entries(entries))
+
+def totals(path: str = None) -> Dict[str, int]:
+    """Итоги по пользователям за весь журнал (оборванная последняя строка пропускается).
+    Запись removal обнуляет итог пользователя"""
+    path = path or PATH_TO_LEDGER_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as file:
+        raw = file.read()
+
+    result: Dict[bytes, int] = {}
+    get = result.get
+    removal = REMOVAL.encode('utf-8')
+    skipped = 0
+    for line in raw.split(b"\n"):
+        columns = line.split(b"\t", 4)
+        if len(columns) < 4:
+            skipped += bool(line)
+            continue
+        try:
+            delta = int(columns[2])
+        except ValueError:
+            skipped += 1
+            continue
+        user_id = columns[1]
+        if columns[3] == removal:
+            result[user_id] = 0
+        else:
+            result[user_id] = get(user_id, 0) + delta
+    if skipped:
+        logger.warning(f"⚠️ Пропущено повреждённых строк журнала начислений: {skipped}")
+    return {user_id.decode('utf-8'): total for user_id, total in result.items()}
+
+async def rebuild_totals() -> int:
+    """Пересчитать score всех пользователей по журналу; возвращает число исправленных"""
+    import store
+    import locks
+    from utils import run_in_storage_thread
+    async with locks.lock(locks.whole(PATH_TO_USERS_FILE)):
+        ledger_totals = await run_in_storage_thread(totals)
+        async with store.edit(PATH_TO_USERS_FILE) as users:
+            for user_id, user_data in users.data.items():
+                total = ledger_totals.get(user_id, 0)
+                if stored_score(user_data) != total:
+                    users.set((user_id, "score"), total)
+            fixed = len(users.changes)
+    if fixed and not users.saved:
+        logger.error("❌ Ошибка сохранения пересчитанных баллов")
+        return 0
+    return fixed
+
+async def _main_rebuild():
+    from utils import flush_json_file
+    started = time.monotonic()
+    fixed = await rebuild_totals()
+    await flush_json_file(PATH_TO_USERS_FILE)
+    logger.info(f"✅ Баллы пересчитаны по журналу за {time.monotonic() - started:.2f} с, исправлено: {fixed}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] == ["rebuild"]:
+        asyncio.run(_main_rebuild())
+    else:
+        print("Использование: python ledger.py rebuild")
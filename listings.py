@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Tuple
+from config import PATH_TO_PROJECTS_FILE, NON_DISPLAY_CHARACTER
+from utils import SnapshotIndex
+import membership
+
+# Готовые списки проектов категорий для меню: порядок, названия и "участники/места".
+# Список категории строится при первом обращении и сбрасывается, когда меняются
+# проекты этой категории.
+# Скрытые проекты (название начинается с NON_DISPLAY_CHARACTER) лежат отдельно:
+# пользователю они добавляются по его участию из индекса membership.
+
+class _Listing:
+    """Список проектов одной категории"""
+    __slots__ = ("visible", "hidden", "editing", "shown")
+
+    def __init__(self, category_data: Dict[str, Any]):
+        self.visible: List[Tuple[int, str, str]] = []     # (позиция, project_id, кнопка)
+        self.hidden: Dict[str, Tuple[int, str]] = {}       # project_id -> (позиция, кнопка)
+        self.editing: Tuple[List[str], List[str]] = ([], [])  # кнопки и project_id для модераторов
+        for position, (project_id, project) in enumerate(category_data.items()):
+            name = project.get("name", "")
+            count = len(project.get("members", {}))
+            max_members = project.get("max_members")
+            # Без ограничения мест - только число участников
+            members = f"{count}/{max_members}" if max_members is not None else str(count)
+            self.editing[0].append(f"{name} {members}")
+            self.editing[1].append(project_id)
+            if NON_DISPLAY_CHARACTER and name.startswith(NON_DISPLAY_CHARACTER):
+                self.hidden[project_id] = (position, f"{name[len(NON_DISPLAY_CHARACTER):]} {members}")
+            else:
+                self.visible.append((position, project_id, f"{name} {members}"))
+        # Кнопки и project_id видимых всем проектов
+        self.shown = ([preview for _, _, preview in self.visible], [project_id for _, project_id, _ in self.visible])
+
+_listings: Dict[str, _Listing] = {}
+
+def _rebuild(projects_data: Dict[str, Any]):
+    _listings.clear()
+
+def _apply(snapshot, changes):
+    for _, path, _ in changes:
+        _listings.pop(path[0], None)
+
+_ensure = SnapshotIndex(PATH_TO_PROJECTS_FILE, _rebuild, _apply).ensure
+
+def _listing(projects_data: Dict[str, Any], category: str) -> _Listing:
+    _ensure(projects_data)
+    listing = _listings.get(category)
+    if listing is None:
+        listing = _listings[category] = _Listing(projects_data.get(category, {}))
+    return listing
+
+def category_listing(projects_data: Dict[str, Any], category: str, user_id: str = None,
+                     is_editing_mode: bool = False) -> Tuple[List[str], List[str]]:
+    """Кнопки и project_id проектов категории для пользователя (или для редактирования)"""
+    listing = _listing(projects_data, category)
+    if is_editing_mode:
+        return listing.editing
+
+    if not listing.hidden or not user_id:
+        return listing.shown
+    overlay = [
+        (listing.hidden[project_id][0], project_id, listing.hidden[project_id][1])
+        for project_category, project_id in membership.projects_of(projects_data, user_id)
+        if project_category == category and project_id in listing.hidden
+    ]
+    if not overlay:
+        return listing.shown
+    entries = sorted(listing.visible + overlay)
+    return [preview for _, _, preview in entries], [project_id for _, project_id, _ in entries]
@@ -0,0 +1,81 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Set, Tuple
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+
+# Блокировки для чтения-изменения-записи в services.py.
+# Ключ (file_path, entity) блокирует одну сущность, ключ (file_path,) - весь файл:
+# он ждёт, пока отпустят все сущности файла, и не пускает новые.
+# Ключи всегда берутся в отсортированном порядке, поэтому взаимных блокировок нет.
+
+LockKey = Tuple[str, ...]
+
+def user(user_id: str) -> LockKey:
+    return (PATH_TO_USERS_FILE, str(user_id))
+
+def project(category: str, project_id: str) -> LockKey:
+    return (PATH_TO_PROJECTS_FILE, f"{category}:::{project_id}")
+
+def whole(file_path: str) -> LockKey:
+    return (file_path,)
+
+class _FileLock:
+    """Состояние блокировок одного файла"""
+
+    def __init__(self):
+        self.changed = asyncio.Condition()
+        self.exclusive = False
+        self.exclusive_waiting = 0
+        self.entities: Set[str] = set()  # занятые сущности
+
+_files: Dict[str, _FileLock] = {}
+
+def _file(file_path: str) -> _FileLock:
+    if file_path not in _files:
+        _files[file_path] = _FileLock()
+    return _files[file_path]
+
+async def _acquire(key: LockKey):
+    state = _file(key[0])
+    async with state.changed:
+        if len(key) == 1:
+            state.exclusive_waiting += 1
+            try:
+                await state.changed.wait_for(lambda: not state.exclusive and not state.entities)
+            finally:
+                state.exclusive_waiting -= 1
+            state.exclusive = True
+        else:
+            entity = key[1]
+            # Ожидающая блокировка файла пропускается вперёд, чтобы её не задерживали бесконечно
+            await state.changed.wait_for(lambda: not state.exclusive and not state.exclusive_waiting
+                                         and entity not in state.entities)
+            state.entities.add(entity)
+
+async def _release(key: LockKey):
+    state = _file(key[0])
+    async with state.changed:
+        if len(key) == 1:
+            state.exclusive = False
+        else:
+            state.entities.discard(key[1])
+        state.changed.notify_all()
+
+def _normalize(keys) -> list:
+    """Убрать повторы и сущности файлов, которые блокируются целиком, и отсортировать"""
+    whole_files = {key[0] for key in keys if len(key) == 1}
+    unique = {key for key in keys if len(key) == 1 or key[0] not in whole_files}
+    return sorted(unique)
+
+@asynccontextmanager
+async def lock(*keys: LockKey):
+    """`async with locks.lock(locks.user(uid), locks.project(category, project_id)):`"""
+    acquired = []
+    try:
+        for key in _normalize(keys):
+            await _acquire(key)
+            acquired.append(key)
+        yield
+    finally:
+        for key in reversed(acquired):
+            await _release(key)
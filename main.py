@@ -12,7 +12,9 @@ from handlers.project_handlers import router as project_router
 from handlers.report_handlers import router as report_router
 from handlers.moderation_handlers import router as moderation_router
 from initialization import run_initialization 
-from scheduler import timer
+from scheduler import timer, journal_compactor
+from utils import JOURNAL_MODE, STORAGE_BACKEND, flush_json_file
+from keyboards import warm_up as warm_up_keyboards
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,13 +35,22 @@ async def main():
     dp.include_router(report_router)
     dp.include_router(moderation_router)
     
+    warm_up_keyboards()
+    
     # Start scheduler
     asyncio.create_task(timer())
+    if JOURNAL_MODE and STORAGE_BACKEND == "json":
+        asyncio.create_task(journal_compactor())
     
     logger.info("Bot started successfully")
     
     # Start polling
-    await dp.start_polling(bot)
+    try:
+        # Диспетчер обрабатывает обновления параллельно (каждое - отдельной задачей),
+        # поэтому изменения данных в services.py защищены блокировками из locks.py
+        await dp.start_polling(bot)
+    finally:
+        await flush_json_file()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import config
+from config import MEDIA_FOLDER_NAME
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Фото проектов (ActiveState.editing_project_photo в moderation_handlers).
+# Каждая загрузка получает своё имя файла (суффикс upload_id), поэтому путь к фото
+# однозначно указывает на загрузку - по нему services.set_preview_file_id проверяет,
+# что фото не сменилось. Старые файлы удаляет services.set_preview_photo.
+# Файл из Telegram скачивается потоком во временный файл, затем в отдельном потоке
+# уменьшается до PREVIEW_MAX_SIDE по большей стороне и пережимается в JPEG;
+# рядом сохраняется миниатюра. Без Pillow фото сохраняется как есть.
+PREVIEW_MAX_SIDE = getattr(config, "PREVIEW_MAX_SIDE", 1280)
+PREVIEW_QUALITY = getattr(config, "PREVIEW_QUALITY", 82)
+THUMBNAIL_MAX_SIDE = getattr(config, "THUMBNAIL_MAX_SIDE", 320)
+THUMBNAIL_QUALITY = getattr(config, "THUMBNAIL_QUALITY", 70)
+
+_image_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media")
+
+def _base_name(category: str, project_id: str) -> str:
+    return os.path.join(MEDIA_FOLDER_NAME, f"project:::{category}:::{project_id}")
+
+def _save_jpeg(image, path: str, quality: int):
+    temp_path = f"{path}.tmp"
+    image.save(temp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(temp_path, path)
+
+def _process(source: str, photo_path: str, thumbnail_path: str):
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE), Image.LANCZOS)
+        _save_jpeg(image, photo_path, PREVIEW_QUALITY)
+        image.thumbnail((THUMBNAIL_MAX_SIDE, THUMBNAIL_MAX_SIDE), Image.LANCZOS)
+        _save_jpeg(image, thumbnail_path, THUMBNAIL_QUALITY)
+
+async def save_project_photo(bot, file_path: str, category: str, project_id: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Скачать и обработать фото проекта; возвращает (фото, миниатюра) или None"""
+    base_name = _base_name(category, project_id)
+    upload_id = uuid.uuid4().hex[:8]
+    download_path = f"{base_name}-{upload_id}.download"
+    try:
+        await bot.download_file(file_path, destination=download_path)
+    except Exception as e:
+        logger.error(f"❌ Ошибка загрузки фото проекта {category}:::{project_id}: {e}")
+        if os.path.exists(download_path):
+            os.remove(download_path)
+        return None
+
+    if Image is not None:
+        photo_path, thumbnail_path = f"{base_name}-{upload_id}.jpg", f"{base_name}-{upload_id}-thumb.jpg"
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                _image_executor, _process, download_path, photo_path, thumbnail_path)
+            os.remove(download_path)
+            return photo_path, thumbnail_path
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось обработать фото проекта {category}:::{project_id}, сохраняю как есть: {e}")
+
+    file_extension = os.path.splitext(file_path)[1] if file_path else '.jpg'
+    photo_path = f"{base_name}-{upload_id}{file_extension or '.jpg'}"
+    os.replace(download_path, photo_path)
+    return photo_path, None
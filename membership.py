@@ -0,0 +1,92 @@
+from typing import Any, Dict, FrozenSet, Set, Tuple
+from config import PATH_TO_PROJECTS_FILE
+from utils import SnapshotIndex
+
+# Индекс участия в проектах в обе стороны, построенный по project["members"].
+# Во все функции передаётся опубликованный снимок projects (из read_json_file_async
+# или tx.projects.base), а не черновик правки.
+
+ProjectKey = Tuple[str, str]  # (category, project_id)
+
+_user_projects: Dict[str, Set[ProjectKey]] = {}
+_project_members: Dict[ProjectKey, Set[str]] = {}
+
+def _link(user_id: str, project: ProjectKey):
+    _user_projects.setdefault(user_id, set()).add(project)
+    _project_members.setdefault(project, set()).add(user_id)
+
+def _unlink(user_id: str, project: ProjectKey):
+    projects = _user_projects.get(user_id)
+    if projects is not None:
+        projects.discard(project)
+        if not projects:
+            del _user_projects[user_id]
+    members = _project_members.get(project)
+    if members is not None:
+        members.discard(user_id)
+
+def _drop_project(project: ProjectKey):
+    for user_id in list(_project_members.pop(project, ())):
+        _unlink(user_id, project)
+
+def _put_project(project: ProjectKey, members: Any):
+    _drop_project(project)
+    _project_members[project] = set()
+    for user_id in members or {}:
+        _link(user_id, project)
+
+def _rebuild(projects_data: Dict[str, Any]):
+    _user_projects.clear()
+    _project_members.clear()
+    for category, projects in projects_data.items():
+        for project_id, project in projects.items():
+            _put_project((category, project_id), project.get("members", {}))
+
+def _apply(op: str, path: Tuple, value: Any):
+    category = path[0]
+    if len(path) == 1:
+        for project in [key for key in _project_members if key[0] == category]:
+            _drop_project(project)
+        if op == "set":
+            for project_id, project in value.items():
+                _put_project((category, project_id), project.get("members", {}))
+        return
+
+    project = (category, path[1])
+    if len(path) == 2:
+        if op == "set":
+            _put_project(project, value.get("members", {}))
+        elif op == "delete":
+            _drop_project(project)
+        return
+
+    if path[2] != "members":
+        return
+    if len(path) == 3:
+        _put_project(project, value if op == "set" else {})
+    elif op == "set":
+        _link(path[3], project)
+    elif op == "delete":
+        _unlink(path[3], project)
+
+def _apply_changes(snapshot: Dict[str, Any], changes):
+    for op, path, value in changes:
+        _apply(op, tuple(path), value)
+
+_index = SnapshotIndex(PATH_TO_PROJECTS_FILE, _rebuild, _apply_changes)
+_ensure = _index.ensure
+
+def projects_of(projects_data: Dict[str, Any], user_id: str) -> FrozenSet[ProjectKey]:
+    """Проекты пользователя: {(category, project_id), ...}"""
+    _ensure(projects_data)
+    return frozenset(_user_projects.get(str(user_id), ()))
+
+def members_of(projects_data: Dict[str, Any], category: str, project_id: str) -> FrozenSet[str]:
+    """Участники проекта"""
+    _ensure(projects_data)
+    return frozenset(_project_members.get((category, project_id), ()))
+
+def is_member(projects_data: Dict[str, Any], user_id: str, category: str, project_id: str) -> bool:
+    """Состоит ли пользователь в проекте"""
+    _ensure(projects_data)
+    return str(user_id) in _project_members.get((category, project_id), ())
@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Типизированные модели пользователей и проектов поверх снимков из utils.
+# Данные хранятся только в снимках (их меняет store.edit(), пишут бэкенды и журнал),
+# модель строится по узлу снимка при обращении и нигде не хранится, поэтому
+# модели не добавляют памяти к снимку. Как и снимки, модели только для чтения.
+
+NOT_SPECIFIED = "Не указано"
+
+ProjectKey = Tuple[str, str]  # (category, project_id)
+
+def _text(data: Dict[str, Any], key: str) -> str:
+    value = data.get(key, NOT_SPECIFIED)
+    return NOT_SPECIFIED if value is None else str(value)
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+class User:
+    """Пользователь"""
+    __slots__ = ("id", "username", "name", "surname", "IDfirst", "phone", "score",
+                 "completed_projects", "active_projects", "ban", "consent_accepted")
+
+    def __init__(self, user_id: str, username: str = NOT_SPECIFIED, name: str = NOT_SPECIFIED,
+                 surname: str = NOT_SPECIFIED, IDfirst: str = NOT_SPECIFIED, phone: str = NOT_SPECIFIED,
+                 score: int = 0, completed_projects: int = 0, active_projects: Tuple[str, ...] = (),
+                 ban: bool = False, consent_accepted: Optional[str] = None):
+        self.id = user_id
+        self.username = username
+        self.name = name
+        self.surname = surname
+        self.IDfirst = IDfirst
+        self.phone = phone
+        self.score = score
+        self.completed_projects = completed_projects
+        self.active_projects = active_projects
+        self.ban = ban
+        self.consent_accepted = consent_accepted
+
+    @classmethod
+    def from_dict(cls, user_id: str, data: Dict[str, Any]) -> "User":
+        return cls(
+            str(user_id),
+            username=str(data.get("username") or "Неизвестный пользователь"),
+            name=_text(data, "name"),
+            surname=_text(data, "surname"),
+            IDfirst=_text(data, "IDfirst"),
+            phone=_text(data, "phone"),
+            score=_int(data.get("score", 0)),
+            completed_projects=_int(data.get("completed_projects", 0)),
+            active_projects=tuple(data.get("active_projects") or ()),
+            ban=bool(data.get("ban", 0)),
+            consent_accepted=data.get("consent_accepted"),
+        )
+
+    @property
+    def is_new(self) -> bool:
+        """Регистрация не пройдена (имя ещё не указано)"""
+        return self.name == NOT_SPECIFIED
+
+    @property
+    def missing_fields(self) -> List[str]:
+        """Незаполненные поля, нужные для участия в проектах"""
+        return [field for field in ("name", "surname", "IDfirst", "phone")
+                if getattr(self, field) == NOT_SPECIFIED]
+
+    @property
+    def display_name(self) -> str:
+        """Имя для рейтинга: имя и фамилия или username"""
+        name = " ".join(part for part in (self.name, self.surname) if part != NOT_SPECIFIED).strip()
+        return name or self.username
+
+    def __repr__(self):
+        return f"User({self.id!r}, {self.display_name!r}, score={self.score})"
+
+class Membership:
+    """Участие пользователя в проекте"""
+    __slots__ = ("user_id", "category", "project_id", "role")
+
+    def __init__(self, user_id: str, category: str, project_id: str, role: str = "участник"):
+        self.user_id = user_id
+        self.category = category
+        self.project_id = project_id
+        self.role = role
+
+    def __repr__(self):
+        return f"Membership({self.user_id!r}, {self.category!r}, {self.project_id!r}, {self.role!r})"
+
+class Project:
+    """Проект"""
+    __slots__ = ("category", "id", "name", "description", "url", "date", "prize", "unleaveable",
+                 "approval_required", "preview_photo", "preview_thumbnail", "preview_file_id", "max_members", "members")
+
+    def __init__(self, category: str, project_id: str, name: str = "", description: str = "Без описания",
+                 url: Optional[str] = None, date: str = "00.01.2000", prize: int = 0,
+                 unleaveable: bool = False, approval_required: bool = False,
+                 preview_photo: Optional[str] = None, preview_thumbnail: Optional[str] = None,
+                 preview_file_id: Optional[str] = None, max_members: int = 100,
+                 members: Tuple[Membership, ...] = ()):
+        self.category = category
+        self.id = project_id
+        self.name = name
+        self.description = description
+        self.url = url
+        self.date = date
+        self.prize = prize
+        self.unleaveable = unleaveable
+        self.approval_required = approval_required
+        self.preview_photo = preview_photo
+        self.preview_thumbnail = preview_thumbnail
+        self.preview_file_id = preview_file_id  # file_id фото в Telegram после первой отправки
+        self.max_members = max_members
+        self.members = members
+
+    @classmethod
+    def from_dict(cls, category: str, project_id: str, data: Dict[str, Any]) -> "Project":
+        members = tuple(
+            Membership(str(user_id), category, project_id, (member or {}).get("role", "участник"))
+            for user_id, member in (data.get("members") or {}).items()
+        )
+        return cls(
+            category,
+            project_id,
+            name=data.get("name", ""),
+            description=data.get("description", "Без описания"),
+            url=data.get("url"),
+            date=data.get("date", "00.01.2000"),
+            prize=_int(data.get("prize", 0)),
+            unleaveable=bool(data.get("unleaveable", 0)),
+            approval_required=bool(data.get("approval_required", 0)),
+            preview_photo=data.get("preview_photo"),
+            preview_thumbnail=data.get("preview_thumbnail"),
+            preview_file_id=data.get("preview_file_id"),
+            max_members=_int(data.get("max_members", 100), 100),
+            members=members,
+        )
+
+    @property
+    def key(self) -> ProjectKey:
+        return (self.category, self.id)
+
+    @property
+    def free_places(self) -> int:
+        return max(self.max_members - len(self.members), 0)
+
+    def __repr__(self):
+        return f"Project({self.category!r}, {self.id!r}, {self.name!r})"
+
+def user(users_data: Dict[str, Any], user_id: str) -> Optional[User]:
+    """Модель пользователя из снимка users (None, если пользователя нет)"""
+    node = users_data.get(str(user_id))
+    return None if node is None else User.from_dict(str(user_id), node)
+
+def project(projects_data: Dict[str, Any], category: str, project_id: str) -> Optional[Project]:
+    """Модель проекта из снимка projects (None, если проекта нет)"""
+    node = projects_data.get(category, {}).get(project_id)
+    return None if node is None else Project.from_dict(category, project_id, node)
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional, Tuple
+from config import NON_DISPLAY_CHARACTER, MEMBERS_IN_MEMBERSLIST
+
+# Кэш карточек проектов (project_handlers.project_info): текст, не зависящий от зрителя.
+# Карточка действительна, пока не изменились узел проекта в снимке projects и узлы
+# показанных участников в снимке users (при изменении узлы заменяются копиями,
+# см. store.py), поэтому начисление баллов другим пользователям её не сбрасывает.
+# Из участников разрешаются только первые MEMBERS_IN_MEMBERSLIST (+1 на случай,
+# если среди них сам зритель - он показывается первым).
+
+class Card:
+    """Части карточки проекта, общие для всех зрителей"""
+    __slots__ = ("project", "member_nodes", "head", "tail", "members", "more")
+
+    def __init__(self, project: Dict[str, Any], member_nodes: Tuple, head: str, tail: str,
+                 members: List[Tuple[str, str]], more: str):
+        self.project = project
+        self.member_nodes = member_nodes
+        self.head = head          # название, описание, сроки, награда, участники
+        self.tail = tail          # ссылка на проект
+        self.members = members    # [(user_id, "Имя Фамилия"), ...] первых участников
+        self.more = more          # "... и еще N участников ..." или ""
+
+    def is_valid(self, project: Dict[str, Any], users_data: Dict[str, Any]) -> bool:
+        return (self.project is project and
+                all(users_data.get(user_id) is node for user_id, node in self.member_nodes))
+
+    def text(self, user_id: str, users_data: Dict[str, Any]) -> str:
+        """Текст карточки для зрителя (он первый в списке, если участвует)"""
+        member_list = []
+        if user_id in self.project.get("members", {}):
+            viewer = users_data.get(user_id, {})
+            member_list.append(f"1. {viewer.get('name')} {viewer.get('surname')}")
+        for member_id, member_name in self.members:
+            if len(member_list) >= MEMBERS_IN_MEMBERSLIST:
+                break
+            if member_id != user_id:
+                member_list.append(f"{len(member_list)+1}. {member_name}")
+        if self.more:
+            member_list.append(self.more)
+        return self.head + "\n".join(member_list) + self.tail
+
+    @property
+    def many_members(self) -> bool:
+        return bool(self.more)
+
+_cards: Dict[Tuple[str, str], Card] = {}
+
+async def _build(project: Dict[str, Any], users_data: Dict[str, Any]) -> Card:
+    from utils import format_points, format_member_count
+    name = project.get("name", "Без названия")
+    display_name = name[len(NON_DISPLAY_CHARACTER):] if name.startswith(NON_DISPLAY_CHARACTER) else name
+    description = project.get("description", "Без описания")
+    date = project.get("date", "Не указана")
+    prize_points = await format_points(int(project.get("prize", "0")))
+    members = project.get("members", {})
+    max_mem = project.get("max_members", 1000)
+
+    head = (
+        f"<b>{display_name}</b>\n\n"
+        f"{description}\n\n"
+        f"🗓️ <b>Сроки: до {date}</b>\n"
+        f"⭐️ <b>Награда: {prize_points}</b>\n"
+        f"👤 <b>Участники: {len(members)}/{max_mem}</b>\n"
+    )
+    url = project.get("url")
+    tail = f"\n\n<a href='{url}'>Перейти к проекту</a>" if url else ""
+
+    member_nodes = []
+    member_names = []
+    for member_id in members:
+        if len(member_names) > MEMBERS_IN_MEMBERSLIST:
+            break
+        member_data = users_data.get(member_id)
+        member_nodes.append((member_id, member_data))
+        member_data = member_data or {}
+        member_names.append((member_id, f"{member_data.get('name')} {member_data.get('surname')}"))
+
+    more = ""
+    if len(members) > MEMBERS_IN_MEMBERSLIST:
+        more = f"\n... и еще {await format_member_count(len(members) - MEMBERS_IN_MEMBERSLIST)} ..."
+    return Card(project, tuple(member_nodes), head, tail, member_names, more)
+
+async def get_card(projects_data: Dict[str, Any], users_data: Dict[str, Any],
+                   category: str, project_id: str) -> Optional[Card]:
+    """Карточка проекта из кэша (None, если проекта нет)"""
+    project = projects_data.get(category, {}).get(project_id)
+    key = (category, project_id)
+    if not project:
+        _cards.pop(key, None)
+        return None
+    card = _cards.get(key)
+    if card is None or not card.is_valid(project, users_data):
+        card = _cards[key] = await _build(project, users_data)
+    return card
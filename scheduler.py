@@ -1,32 +1,36 @@
 import asyncio
 import datetime
-from config import POLLING_TIMEOUT
-from services import get_all_projects, update_project_data
+from config import POLLING_TIMEOUT, PATH_TO_PROJECTS_FILE
+from services import get_all_projects
+import store
+import locks
 
 async def check_completed_projects():
     """Проверка и отметка проектов, которые заканчиваются сегодня"""
     date_today = datetime.datetime.now().strftime("%d.%m.%Y")
-    projects_data = await get_all_projects()
     edited = False
     
-    for category in projects_data:
-        for project_id, project in projects_data[category].items():
-            date = project.get("date", "")
-            if date == date_today:
-                desc_text = "🔚 Этот проект завершается сегодня, не забудьте отправить достаточно фотографий, для получения баллов! 🔚"
-                name_text = "🔚 Завершён:"
-                
-                if (not project["description"].startswith(desc_text) and 
-                    not project["name"].startswith(name_text)):
-                    
-                    name = f'{name_text} {project["name"]}'
-                    description = f'{desc_text}\n\n{project["description"]}'
+    # Все отметки сохраняются одной записью
+    async with locks.lock(locks.whole(PATH_TO_PROJECTS_FILE)), store.transaction() as tx:
+        projects_data = tx.projects.data
+        for category in projects_data:
+            for project_id, project in projects_data[category].items():
+                date = project.get("date", "")
+                if date == date_today:
+                    desc_text = "🔚 Этот проект завершается сегодня, не забудьте отправить достаточно фотографий, для получения баллов! 🔚"
+                    name_text = "🔚 Завершён:"
                     
-                    await update_project_data(category, project_id, "name", name)
-                    await update_project_data(category, project_id, "description", description)
-                    await update_project_data(category, project_id, "unleaveable", 1)
-                    await update_project_data(category, project_id, "completed", 1)
-                    edited = True
+                    if (not project["description"].startswith(desc_text) and 
+                        not project["name"].startswith(name_text)):
+                        
+                        name = f'{name_text} {project["name"]}'
+                        description = f'{desc_text}\n\n{project["description"]}'
+                        
+                        tx.projects.set((category, project_id, "name"), name)
+                        tx.projects.set((category, project_id, "description"), description)
+                        tx.projects.set((category, project_id, "unleaveable"), 1)
+                        tx.projects.set((category, project_id, "completed"), 1)
+                        edited = True
     
     if edited:
         print("Отмечены завершенные проекты для сегодняшней даты")
@@ -46,6 +50,18 @@ async def ask_for_removing_old_projects():
                 await send_project_to_moderators(category=category, project_id=project_id, bot=bot)
     await bot.session.close()
 
+async def journal_compactor():
+    """Фоновое сжатие журналов изменений всех файлов данных"""
+    import journal
+    from utils import compact_journal_async, JOURNAL_COMPACT_RECORDS, JOURNAL_COMPACT_SECONDS
+    
+    while True:
+        await asyncio.sleep(1)
+        for file_path in journal.pending_files():
+            if journal.needs_compaction(file_path, JOURNAL_COMPACT_RECORDS, JOURNAL_COMPACT_SECONDS):
+                if not await compact_journal_async(file_path):
+                    print(f"Не удалось сжать журнал изменений: {file_path}")
+
 async def timer():
     """Основной таймер планировщика"""
     now = datetime.datetime.now()
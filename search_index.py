@@ -0,0 +1,112 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from config import PATH_TO_USERS_FILE, NON_DISPLAY_CHARACTER
+from utils import SnapshotIndex
+
+# Индексы для поиска пользователей (/поиск в moderation_handlers).
+# Точные совпадения: username, IDfirst и телефон (только цифры) -> TG ID.
+# Триграммы имени и фамилии - короткий список кандидатов для нечёткого поиска,
+# триграммы TG ID, username, IDfirst и телефона - кандидаты для поиска подстроки.
+
+# Нормализованные значения (как их сравнивает поиск) и значения как есть
+_normalized: Dict[str, Set[str]] = {}
+_raw: Dict[str, Set[str]] = {}
+_name_trigrams: Dict[str, Set[str]] = {}
+_field_trigrams: Dict[str, Set[str]] = {}
+_INDEXES = (_normalized, _raw, _name_trigrams, _field_trigrams)
+# Ключи, под которыми проиндексирован пользователь (по одному кортежу на индекс)
+_user_keys: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+
+# Сколько кандидатов по триграммам имени сравнивается через difflib
+NAME_SHORTLIST = 200
+
+def _text(user_data: Dict[str, Any], field: str) -> str:
+    value = user_data.get(field)
+    return value if isinstance(value, str) else ""
+
+def phone_digits(phone: str) -> str:
+    """Телефон без невидимого символа, '+' и '-' (для сохранённых номеров - только цифры)"""
+    return phone.strip(NON_DISPLAY_CHARACTER).lower().replace('-', '').replace('+', '')
+
+def trigrams(text: str, padded: bool = True) -> Set[str]:
+    """Триграммы строки в нижнем регистре (ё = е); padded - с пробелами по краям слов"""
+    text = " ".join(text.lower().replace("ё", "е").split())
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _keys(user_id: str, user_data: Dict[str, Any]) -> Tuple[Tuple[str, ...], ...]:
+    username = _text(user_data, "username")
+    id_first = _text(user_data, "IDfirst")
+    phone = _text(user_data, "phone")
+    normalized = (username.lower().replace('@', ''), id_first.lower(), phone_digits(phone))
+    raw = (username, id_first, phone)
+    name_trigrams = set()
+    for text in (_text(user_data, "name"), _text(user_data, "surname")):
+        name_trigrams |= trigrams(text)
+    field_trigrams = set()
+    for text in (user_id, username.lower(), id_first.lower(), phone_digits(phone)):
+        field_trigrams |= trigrams(text, padded=False)
+    return (tuple(key for key in normalized if key), tuple(key for key in raw if key),
+            tuple(name_trigrams), tuple(field_trigrams))
+
+def _unindex(user_id: str):
+    for index, keys in zip(_INDEXES, _user_keys.pop(user_id, ())):
+        for key in keys:
+            users = index.get(key)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del index[key]
+
+def _index(users_data: Dict[str, Any], user_id: str):
+    _unindex(user_id)
+    user_data = users_data.get(user_id)
+    if not isinstance(user_data, dict):
+        return
+    keys = _user_keys[user_id] = _keys(user_id, user_data)
+    for index, index_keys in zip(_INDEXES, keys):
+        for key in index_keys:
+            index.setdefault(key, set()).add(user_id)
+
+def _rebuild(users_data: Dict[str, Any]):
+    for index in _INDEXES:
+        index.clear()
+    _user_keys.clear()
+    for user_id in users_data:
+        _index(users_data, user_id)
+
+def _apply(snapshot: Dict[str, Any], changes):
+    for user_id in {path[0] for _, path, _ in changes}:
+        _index(snapshot, user_id)
+
+_ensure = SnapshotIndex(PATH_TO_USERS_FILE, _rebuild, _apply).ensure
+
+def exact_matches(users_data: Dict[str, Any], query: str) -> List[str]:
+    """TG ID пользователей, у которых TG ID, username, IDfirst или телефон совпадает с запросом"""
+    _ensure(users_data)
+    query = query.strip()
+    normalized = query.lower()
+    found = set(_normalized.get(normalized, ())) | _raw.get(query, set())
+    if normalized in users_data:
+        found.add(normalized)
+    return sorted(found)
+
+def substring_candidates(users_data: Dict[str, Any], query: str) -> Iterable[str]:
+    """Пользователи, у которых TG ID, username, IDfirst или телефон может содержать запрос"""
+    _ensure(users_data)
+    query_trigrams = trigrams(query.strip(), padded=False)
+    if not query_trigrams or " " in query.strip():
+        # Короткий запрос или запрос из нескольких слов - проверяются все
+        return users_data
+    postings = sorted((_field_trigrams.get(trigram, set()) for trigram in query_trigrams), key=len)
+    return sorted(set.intersection(*postings))
+
+def name_candidates(users_data: Dict[str, Any], query: str, limit: int = NAME_SHORTLIST) -> List[str]:
+    """Пользователи с наибольшим числом общих с запросом триграмм имени и фамилии"""
+    _ensure(users_data)
+    shared = Counter()
+    for trigram in trigrams(query):
+        shared.update(_name_trigrams.get(trigram, ()))
+    ranked = sorted(shared.items(), key=lambda item: (-item[1], item[0]))
+    return [user_id for user_id, _ in ranked[:limit]]
@@ -0,0 +1,120 @@
+import json
+import gzip
+import logging
+from typing import Any, Tuple
+import config
+
+logger = logging.getLogger(__name__)
+
+# Формат файлов users/projects: "json" (с отступами), "json-compact", "orjson", "msgpack"
+DATA_FORMAT = getattr(config, "DATA_FORMAT", "json")
+# Сжатие поверх формата: None, "gzip" или "zstd"
+DATA_COMPRESSION = getattr(config, "DATA_COMPRESSION", None)
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def _dump_json(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+
+def _dump_json_compact(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _dump_orjson(data: Any) -> bytes:
+    import orjson
+    return orjson.dumps(data)
+
+def _dump_msgpack(data: Any) -> bytes:
+    import msgpack
+    return msgpack.packb(data, use_bin_type=True)
+
+_DUMPERS = {
+    "json": _dump_json,
+    "json-compact": _dump_json_compact,
+    "orjson": _dump_orjson,
+    "msgpack": _dump_msgpack,
+}
+
+def _load_json(raw: bytes) -> Any:
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(raw.decode('utf-8'))
+    return orjson.loads(raw)
+
+def _load_msgpack(raw: bytes) -> Any:
+    import msgpack
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+def _compress(raw: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+def _decompress(raw: bytes) -> Tuple[bytes, str]:
+    if raw.startswith(GZIP_MAGIC):
+        return gzip.decompress(raw), "gzip"
+    if raw.startswith(ZSTD_MAGIC):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(raw, max_output_size=1 << 31), "zstd"
+    return raw, None
+
+def _is_json(raw: bytes) -> bool:
+    head = raw.lstrip()[:1]
+    return head in (b"{", b"[", b"")
+
+def is_available(data_format: str, compression: str = None) -> bool:
+    """Установлены ли библиотеки для формата и сжатия"""
+    modules = {"orjson": "orjson", "msgpack": "msgpack"}
+    names = [modules[data_format]] if data_format in modules else []
+    if compression == "zstd":
+        names.append("zstandard")
+    for name in names:
+        try:
+            __import__(name)
+        except ImportError:
+            return False
+    return data_format in _DUMPERS and compression in (None, "gzip", "zstd")
+
+def configured() -> Tuple[str, str]:
+    """Формат и сжатие из config (json без сжатия, если библиотек нет)"""
+    if is_available(DATA_FORMAT, DATA_COMPRESSION):
+        return DATA_FORMAT, DATA_COMPRESSION
+    logger.warning(f"⚠️ Формат данных {DATA_FORMAT}/{DATA_COMPRESSION} недоступен, использую json")
+    return "json", None
+
+def dumps(data: Any, data_format: str = None, compression: str = None) -> bytes:
+    """Сериализовать данные в выбранном формате (по умолчанию - из config)"""
+    if data_format is None:
+        data_format, compression = _configured
+    return _compress(_DUMPERS[data_format](data), compression)
+
+def detect(raw: bytes) -> Tuple[str, str]:
+    """Формат и сжатие содержимого файла по первым байтам"""
+    raw, compression = _decompress(raw)
+    return ("json" if _is_json(raw) else "msgpack"), compression
+
+def matches_config(raw: bytes) -> bool:
+    """Записаны ли данные в формате и сжатии из config"""
+    data_format, compression = detect(raw)
+    configured_format, configured_compression = _configured
+    family = "msgpack" if configured_format == "msgpack" else "json"
+    return data_format == family and compression == configured_compression
+
+def loads(raw: bytes) -> Any:
+    """Разобрать содержимое файла в любом поддерживаемом формате"""
+    raw, _ = _decompress(raw)
+    if _is_json(raw):
+        if not raw.strip():
+            raise ValueError("Пустой файл данных")
+        return _load_json(raw)
+    return _load_msgpack(raw)
+
+def load_file(file_path: str) -> Any:
+    with open(file_path, 'rb') as file:
+        return loads(file.read())
+
+_configured = configured()
@@ -1,80 +1,99 @@
 import os
-import random
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
+import config
 from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE, NON_DISPLAY_CHARACTER
-from utils import read_json_file, write_json_file, invalidate_cache
+from utils import read_json_file_async
+import store
+import locks
+import membership
+import models
+import leaderboard
+import ledger
+from models import User, Project
+
+# Последний выданный ID проекта в каждой категории
+PATH_TO_PROJECT_IDS_FILE = getattr(config, "PATH_TO_PROJECT_IDS_FILE",
+                                   os.path.join(os.path.dirname(PATH_TO_PROJECTS_FILE), "project_ids.json"))
 
 async def get_user_data(user_id: str):
     """Получить данные пользователя"""
-    return read_json_file(PATH_TO_USERS_FILE).get(str(user_id))
+    return (await read_json_file_async(PATH_TO_USERS_FILE)).get(str(user_id))
+
+async def get_user(user_id: str) -> Optional[User]:
+    """Получить пользователя"""
+    return models.user(await read_json_file_async(PATH_TO_USERS_FILE), user_id)
 
 async def update_user_data(user_id: str, parm: str, new_value: Any) -> bool:
     """Обновить данные пользователя"""
-    data = read_json_file(PATH_TO_USERS_FILE)
     user_id = str(user_id)
-    if user_id in data:
-        data[user_id][parm] = new_value
-        success = write_json_file(PATH_TO_USERS_FILE, data)
-        if success:
-            invalidate_cache(PATH_TO_USERS_FILE)
-        return success
-    return False
+    async with locks.lock(locks.user(user_id)), store.edit(PATH_TO_USERS_FILE) as users:
+        if user_id not in users.data:
+            return False
+        users.set((user_id, parm), new_value)
+    return users.saved
+
+async def create_user(user_id: str, user_profile: dict) -> bool:
+    """Добавить нового пользователя"""
+    async with locks.lock(locks.user(user_id)), store.edit(PATH_TO_USERS_FILE) as users:
+        users.set((str(user_id),), user_profile)
+    return users.saved
 
 async def remove_user(user_id: str) -> bool:
     """Удалить пользователя из системы"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    
     user_id = str(user_id)
-    if user_id not in users_data:
-        return False
-    
-    user_active_projects = users_data[user_id].get("active_projects", [])
-    for project_value in user_active_projects:
-        try:
-            category, project_id = project_value.split(":::")
-            if category in projects_data and project_id in projects_data[category]:
-                projects_data[category][project_id]["members"].pop(user_id, None)
-        except:
-            continue
-    
-    del users_data[user_id]
-    
-    success1 = write_json_file(PATH_TO_USERS_FILE, users_data)
-    success2 = write_json_file(PATH_TO_PROJECTS_FILE, projects_data)
-    
-    if success1 and success2:
-        invalidate_cache(PATH_TO_USERS_FILE)
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
+    # Проекты пользователя известны только после чтения, поэтому проекты блокируются целиком
+    async with locks.lock(locks.user(user_id), locks.whole(PATH_TO_PROJECTS_FILE)):
+        async with store.transaction() as tx:
+            if user_id not in tx.users.data:
+                return False
+            
+            for category, project_id in membership.projects_of(tx.projects.base, user_id):
+                tx.projects.delete((category, project_id, "members", user_id))
+            
+            score = ledger.stored_score(tx.users.data[user_id]) or 0
+            tx.users.delete((user_id,))
+        
+        if tx.saved:
+            # Обнуление в журнале: иначе пересчёт вернёт баллы при повторной регистрации с тем же TG ID
+            await ledger.record([(user_id, -score, ledger.REMOVAL, None, None)])
     
-    return success1 and success2
+    return tx.saved
 
 async def get_project_data(category: str, project_id: str):
     """Получить данные проекта"""
-    return read_json_file(PATH_TO_PROJECTS_FILE).get(category, {}).get(project_id)
+    return (await read_json_file_async(PATH_TO_PROJECTS_FILE)).get(category, {}).get(project_id)
+
+async def get_project(category: str, project_id: str) -> Optional[Project]:
+    """Получить проект"""
+    return models.project(await read_json_file_async(PATH_TO_PROJECTS_FILE), category, project_id)
 
 async def get_all_projects():
     """Получить все проекты"""
-    return read_json_file(PATH_TO_PROJECTS_FILE)
+    return await read_json_file_async(PATH_TO_PROJECTS_FILE)
+
+async def free_id(category: str) -> Optional[str]:
+    """Выдать следующий ID проекта в категории (вызывается под блокировкой всего projects).
 
-async def free_id(category: str) -> str:
-    """Сгенерировать свободный ID проекта"""
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
-    category_data = data.get(category, {})
-    while True:
-        new_id = str(random.randint(1, 1000))
-        if new_id not in category_data:
-            return new_id
+    ID растут по счётчику категории в PATH_TO_PROJECT_IDS_FILE и не переиспользуются;
+    без счётчика он начинается с наибольшего из существующих ID.
+    """
+    category_data = (await read_json_file_async(PATH_TO_PROJECTS_FILE)).get(category, {})
+    async with store.edit(PATH_TO_PROJECT_IDS_FILE) as ids:
+        last_id = ids.data.get(category)
+        if last_id is None:
+            last_id = max((int(project_id) for project_id in category_data if project_id.isdigit()), default=0)
+        new_id = int(last_id) + 1
+        while str(new_id) in category_data:
+            new_id += 1
+        ids.set((category,), new_id)
+    
+    if ids.saved:
+        return str(new_id)
+    return None
 
 async def create_project(category: str, project_name: str) -> Optional[str]:
     """Создать новый проект"""
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
-    project_id = await free_id(category)
-    
-    if category not in data:
-        data[category] = {}
-    
-    data[category][project_id] = {
+    project = {
         "name": NON_DISPLAY_CHARACTER + project_name,
         "description": "Без описания",
         "url": None,
@@ -83,148 +102,199 @@ async def create_project(category: str, project_name: str) -> Optional[str]:
         "unleaveable": 0,
         "approval_required": 0,  
         "preview_photo": None,
+        "preview_thumbnail": None,
+        "preview_file_id": None,
         "max_members": 100,
         "members": {}
     }
+    async with locks.lock(locks.whole(PATH_TO_PROJECTS_FILE)):
+        project_id = await free_id(category)
+        if project_id is None:
+            return None
+        
+        async with store.edit(PATH_TO_PROJECTS_FILE) as projects:
+            if category not in projects.data:
+                projects.set((category,), {})
+            projects.set((category, project_id), project)
     
-    success = write_json_file(PATH_TO_PROJECTS_FILE, data)
-    if success:
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
+    if projects.saved:
         return project_id
     return None
 
 async def update_project_data(category: str, project_id: str, parm: str, value: Any) -> bool:
     """Обновить данные проекта"""
-    data = read_json_file(PATH_TO_PROJECTS_FILE)
-    
-    if category not in data or project_id not in data[category]:
-        return False
-    
-    data[category][project_id][parm] = value
-    success = write_json_file(PATH_TO_PROJECTS_FILE, data)
-    
-    if success:
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
-    return success
-
-async def delete_project(category: str, project_id: str) -> bool:
-    """Удалить проект"""
-    data_pr = read_json_file(PATH_TO_PROJECTS_FILE)
-    data_us = read_json_file(PATH_TO_USERS_FILE)
-    
-    if category not in data_pr or project_id not in data_pr[category]:
-        return False
-    
-    project_members = data_pr[category][project_id].get("members", {})
-    for user_id in project_members:
-        if user_id in data_us:
-            project_value = f"{category}:::{project_id}"
-            if project_value in data_us[user_id].get("active_projects", []):
-                data_us[user_id]["active_projects"].remove(project_value)
-    
-    photo_path = data_pr[category][project_id].get("preview_photo")
-    if photo_path and os.path.exists(photo_path):
-        try:
-            os.remove(photo_path)
-        except:
-            pass
-    
-    del data_pr[category][project_id]
-    
-    success1 = write_json_file(PATH_TO_PROJECTS_FILE, data_pr)
-    success2 = write_json_file(PATH_TO_USERS_FILE, data_us)
-    
-    if success1 and success2:
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
-        invalidate_cache(PATH_TO_USERS_FILE)
+    async with locks.lock(locks.project(category, project_id)), store.edit(PATH_TO_PROJECTS_FILE) as projects:
+        if category not in projects.data or project_id not in projects.data[category]:
+            return False
+        
+        projects.set((category, project_id, parm), value)
+    return projects.saved
+
+def _remove_files(paths: Iterable[Optional[str]]):
+    for path in paths:
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except:
+                pass
+
+async def set_preview_photo(category: str, project_id: str, photo_path: Optional[str],
+                            thumbnail_path: Optional[str] = None) -> bool:
+    """Установить фото и миниатюру проекта (file_id прежнего фото в Telegram сбрасывается)"""
+    async with locks.lock(locks.project(category, project_id)), store.edit(PATH_TO_PROJECTS_FILE) as projects:
+        if category not in projects.data or project_id not in projects.data[category]:
+            return False
+        
+        project = projects.data[category][project_id]
+        replaced = {project.get("preview_photo"), project.get("preview_thumbnail")} - {photo_path, thumbnail_path}
+        projects.set((category, project_id, "preview_photo"), photo_path)
+        projects.set((category, project_id, "preview_thumbnail"), thumbnail_path)
+        projects.set((category, project_id, "preview_file_id"), None)
+    if projects.saved:
+        _remove_files(replaced)
+    return projects.saved
+
+async def set_preview_file_id(category: str, project_id: str, photo_path: str, file_id: str) -> bool:
+    """Запомнить file_id загруженного в Telegram фото проекта, если фото с тех пор не сменилось"""
+    async with locks.lock(locks.project(category, project_id)), store.edit(PATH_TO_PROJECTS_FILE) as projects:
+        project = projects.data.get(category, {}).get(project_id)
+        if not project or not photo_path or project.get("preview_photo") != photo_path:
+            return False
+        
+        projects.set((category, project_id, "preview_file_id"), file_id)
+    return projects.saved
+
+async def delete_project(category: str, project_id: str, completed: bool = False) -> bool:
+    """Удалить проект (completed - засчитать проект участникам как завершённый)"""
+    async with locks.lock(locks.project(category, project_id), locks.whole(PATH_TO_USERS_FILE)), store.transaction() as tx:
+        if category not in tx.projects.data or project_id not in tx.projects.data[category]:
+            return False
+        
+        project_value = f"{category}:::{project_id}"
+        for user_id in membership.members_of(tx.projects.base, category, project_id):
+            if user_id in tx.users.data:
+                tx.users.discard((user_id, "active_projects"), project_value)
+                if completed:
+                    completed_projects = int(tx.users.data[user_id].get("completed_projects", 0)) + 1
+                    tx.users.set((user_id, "completed_projects"), completed_projects)
+        
+        project = tx.projects.data[category][project_id]
+        _remove_files((project.get("preview_photo"), project.get("preview_thumbnail")))
+        
+        tx.projects.delete((category, project_id))
     
-    return success1 and success2
+    return tx.saved
 
 async def add_member_to_project(user_id: str, category: str, project_id: str):
     """Добавить участника в проект"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    
-    if (category not in projects_data or 
-        project_id not in projects_data[category] or
-        user_id not in users_data):
-        return {"status": False, "error": "Project or user not found"}
-    
-    project = projects_data[category][project_id]
-    max_members = project.get("max_members", 1000000000)
-    current_members = len(project.get("members", {}))
-    
-    if current_members >= max_members:
-        return {"status": False, "error": "No free places"}
-    
-    if user_id in project.get("members", {}):
-        return {"status": False, "error": "User already member"}
-    
-    projects_data[category][project_id]["members"][user_id] = {"role": "участник"}
-    
-    project_value = f"{category}:::{project_id}"
-    if project_value not in users_data[user_id].get("active_projects", []):
-        users_data[user_id]["active_projects"].append(project_value)
-    
-    success1 = write_json_file(PATH_TO_PROJECTS_FILE, projects_data)
-    success2 = write_json_file(PATH_TO_USERS_FILE, users_data)
+    async with locks.lock(locks.user(user_id), locks.project(category, project_id)), store.transaction() as tx:
+        if (category not in tx.projects.data or 
+            project_id not in tx.projects.data[category] or
+            user_id not in tx.users.data):
+            return {"status": False, "error": "Project or user not found"}
+        
+        project = tx.projects.data[category][project_id]
+        max_members = project.get("max_members", 1000000000)
+        current_members = len(project.get("members", {}))
+        
+        if current_members >= max_members:
+            return {"status": False, "error": "No free places"}
+        
+        if membership.is_member(tx.projects.base, user_id, category, project_id):
+            return {"status": False, "error": "User already member"}
+        
+        tx.projects.set((category, project_id, "members", user_id), {"role": "участник"})
+        tx.users.add((user_id, "active_projects"), f"{category}:::{project_id}")
     
-    if success1 and success2:
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
-        invalidate_cache(PATH_TO_USERS_FILE)
+    if tx.saved:
         return {"status": True, "error": "success"}
     return {"status": False, "error": "Failed to save"}
 
 async def remove_member_from_project(user_id: str, category: str, project_id: str):
     """Удалить участника из проекта"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    
-    if (category not in projects_data or 
-        project_id not in projects_data[category] or
-        user_id not in users_data):
-        return {"status": False, "error": "Project or user not found"}
-    
-    project = projects_data[category][project_id]
-    if user_id not in project.get("members", {}):
-        return {"status": False, "error": "User not member of project"}
-    
-    del projects_data[category][project_id]["members"][user_id]
-    
-    project_value = f"{category}:::{project_id}"
-    if project_value in users_data[user_id].get("active_projects", []):
-        users_data[user_id]["active_projects"].remove(project_value)
-    
-    success1 = write_json_file(PATH_TO_PROJECTS_FILE, projects_data)
-    success2 = write_json_file(PATH_TO_USERS_FILE, users_data)
+    async with locks.lock(locks.user(user_id), locks.project(category, project_id)), store.transaction() as tx:
+        if (category not in tx.projects.data or 
+            project_id not in tx.projects.data[category] or
+            user_id not in tx.users.data):
+            return {"status": False, "error": "Project or user not found"}
+        
+        if not membership.is_member(tx.projects.base, user_id, category, project_id):
+            return {"status": False, "error": "User not member of project"}
+        
+        tx.projects.delete((category, project_id, "members", user_id))
+        tx.users.discard((user_id, "active_projects"), f"{category}:::{project_id}")
     
-    if success1 and success2:
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
-        invalidate_cache(PATH_TO_USERS_FILE)
+    if tx.saved:
         return {"status": True, "error": "success"}
     return {"status": False, "error": "Failed to save"}
 
-async def add_points_to_member(user_id: str, points: int):
-    """Добавить баллы пользователю"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    user_id = str(user_id)
-    
-    if user_id not in users_data:
-        return {"status": False, "error": "User not found"}
-    
-    current_score = users_data[user_id].get("score", 0)
-    users_data[user_id]["score"] = current_score + int(points)
+async def award_points(user_ids: Iterable[str], points: int, reason: str = None,
+                       project: str = None, moderator: str = None):
+    """Начислить баллы нескольким пользователям одной транзакцией (одна запись users).
+
+    Начисления сначала дописываются в журнал ledger, затем меняется score.
+    """
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    points = int(points)
+    results = {}
+    async with locks.lock(*(locks.user(user_id) for user_id in user_ids)):
+        users_data = await read_json_file_async(PATH_TO_USERS_FILE)
+        awarded = []
+        for user_id in user_ids:
+            if user_id in users_data:
+                awarded.append(user_id)
+                results[user_id] = {"status": True, "error": "success"}
+            else:
+                results[user_id] = {"status": False, "error": "User not found"}
+        
+        if not points or not awarded:
+            return {"status": True, "results": results, "error": None}
+        
+        entries = [(user_id, points, reason, project, moderator) for user_id in awarded]
+        if not await ledger.record(entries):
+            for user_id in awarded:
+                results[user_id] = {"status": False, "error": "Failed to save"}
+            return {"status": False, "results": results, "error": "Failed to save"}
+        
+        async with store.edit(PATH_TO_USERS_FILE) as users:
+            for user_id in awarded:
+                current_score = ledger.stored_score(users.data[user_id]) or 0
+                users.set((user_id, "score"), current_score + points)
     
-    success = write_json_file(PATH_TO_USERS_FILE, users_data)
-    if success:
-        invalidate_cache(PATH_TO_USERS_FILE)
-        return {"status": True, "error": "success"}
+    if not users.saved:
+        for user_id in awarded:
+            results[user_id] = {"status": False, "error": "Failed to save"}
+        return {"status": False, "results": results, "error": "Failed to save"}
     
-    return {"status": False, "error": "Failed to save"}
+    return {"status": True, "results": results, "error": None}
+
+async def set_points(user_id: str, score: int, moderator: str = None) -> bool:
+    """Установить баллы пользователя (разница записывается в журнал как исправление)"""
+    user_id = str(user_id)
+    async with locks.lock(locks.user(user_id)):
+        users_data = await read_json_file_async(PATH_TO_USERS_FILE)
+        if user_id not in users_data:
+            return False
+        
+        delta = int(score) - int(users_data[user_id].get("score", 0))
+        if not delta:
+            return True
+        if not await ledger.record([(user_id, delta, ledger.CORRECTION, None, moderator)]):
+            return False
+        
+        async with store.edit(PATH_TO_USERS_FILE) as users:
+            users.set((user_id, "score"), int(score))
+    return users.saved
 
-async def give_reward_to_project_members(category: str, project_id: str):
+async def add_points_to_member(user_id: str, points: int, reason: str = None, moderator: str = None):
+    """Добавить баллы пользователю"""
+    user_id = str(user_id)
+    result = await award_points([user_id], points, reason=reason, moderator=moderator)
+    return result["results"][user_id]
+
+async def give_reward_to_project_members(category: str, project_id: str, moderator: str = None):
     """Наградить всех участников проекта"""
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
+    projects_data = await read_json_file_async(PATH_TO_PROJECTS_FILE)
     
     if category not in projects_data or project_id not in projects_data[category]:
         return {"status": False, "members": 0, "error": "Project not found"}
@@ -236,134 +306,90 @@ async def give_reward_to_project_members(category: str, project_id: str):
     if not members:
         return {"status": True, "members": 0, "error": "No members"}
     
-    rewarded = 0
-    for member_id in members:
-        result = await add_points_to_member(member_id, prize)
-        if result["status"]:
-            rewarded += 1
+    result = await award_points(members, prize, reason=ledger.PROJECT_REWARD,
+                                project=f"{category}:::{project_id}", moderator=moderator)
+    if not result["status"]:
+        return {"status": False, "members": 0, "error": result["error"]}
     
+    rewarded = sum(1 for member_result in result["results"].values() if member_result["status"])
     return {"status": True, "members": rewarded, "error": None}
 
 async def check_project_registration(user_id: str):
     """Проверить готовность пользователя к участию в проектах"""
-    user_data = await get_user_data(user_id)
-    if not user_data:
+    user = await get_user(user_id)
+    if not user:
         return {"status": False, "error": "User not found"}
     
-    required_fields = ["name", "surname", "IDfirst", "phone"]
-    for field in required_fields:
-        if user_data.get(field, "Не указано") == "Не указано":
-            return {"status": False, "error": f"{field} not specified"}
+    missing_fields = user.missing_fields
+    if missing_fields:
+        return {"status": False, "error": f"{missing_fields[0]} not specified"}
     
     return {"status": True, "error": "access"}
 
 async def get_leaderboard_data(user_id: str = None, top_n: int = None):
     """Получить данные рейтинга"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    
-    leaderboard = []
-    for uid, user_data in users_data.items():
-        name = f'{user_data.get("name", "")} {user_data.get("surname", "")}'.strip()
-        if not name:
-            name = user_data.get("username", "Unknown")
-        
-        leaderboard.append({
-            "user_id": uid,
-            "user_name": name,
-            "score": int(user_data.get("score", 0))
-        })
-    
-    leaderboard.sort(key=lambda x: x["score"], reverse=True)
+    users_data = await read_json_file_async(PATH_TO_USERS_FILE)
     
-    user_rank = None
-    if user_id:
-        for rank, user in enumerate(leaderboard, 1):
-            if user["user_id"] == user_id:
-                user_rank = rank
-                break
+    leaderboard_entries = [
+        {"user_id": uid, "user_name": models.user(users_data, uid).display_name, "score": score}
+        for uid, score in leaderboard.top(users_data, top_n or None)
+    ]
+    user_rank = leaderboard.rank_of(users_data, user_id) if user_id else None
     
-    if top_n:
-        leaderboard = leaderboard[:top_n]
-    
-    return leaderboard, user_rank
+    return leaderboard_entries, user_rank
 
 async def ban_user(user_id: str) -> bool:
     """Забанить пользователя"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
-    projects_data = read_json_file(PATH_TO_PROJECTS_FILE)
-    
     user_id = str(user_id)
-    if user_id not in users_data:
-        return False
-    
-    user_active_projects = users_data[user_id].get("active_projects", [])
-    for project_value in user_active_projects:
-        try:
-            category, project_id = project_value.split(":::")
-            if category in projects_data and project_id in projects_data[category]:
-                projects_data[category][project_id]["members"].pop(user_id, None)
-        except:
-            continue
-    
-    users_data[user_id]["ban"] = 1
-    
-    success1 = write_json_file(PATH_TO_USERS_FILE, users_data)
-    success2 = write_json_file(PATH_TO_PROJECTS_FILE, projects_data)
-    
-    if success1 and success2:
-        invalidate_cache(PATH_TO_USERS_FILE)
-        invalidate_cache(PATH_TO_PROJECTS_FILE)
+    # Проекты пользователя известны только после чтения, поэтому проекты блокируются целиком
+    async with locks.lock(locks.user(user_id), locks.whole(PATH_TO_PROJECTS_FILE)), store.transaction() as tx:
+        if user_id not in tx.users.data:
+            return False
+        
+        for category, project_id in membership.projects_of(tx.projects.base, user_id):
+            tx.projects.delete((category, project_id, "members", user_id))
+            tx.users.discard((user_id, "active_projects"), f"{category}:::{project_id}")
+        
+        tx.users.set((user_id, "ban"), 1)
     
-    return success1 and success2
+    return tx.saved
 
 async def unban_user(user_id: str) -> bool:
     """Разбанить пользователя"""
-    users_data = read_json_file(PATH_TO_USERS_FILE)
     user_id = str(user_id)
+    async with locks.lock(locks.user(user_id)), store.edit(PATH_TO_USERS_FILE) as users:
+        if user_id not in users.data:
+            return False
+        
+        users.set((user_id, "ban"), 0)
     
-    if user_id not in users_data:
-        return False
-    
-    users_data[user_id]["ban"] = 0
-    
-    success = write_json_file(PATH_TO_USERS_FILE, users_data)
-    if success:
-        invalidate_cache(PATH_TO_USERS_FILE)
-    
-    return success
+    return users.saved
 
 async def is_user_banned(user_id: str) -> bool:
     """Проверить забанен ли пользователь"""
-    user_data = await get_user_data(user_id)
-    if not user_data:
+    user = await get_user(user_id)
+    if not user:
         return False
     
-    return bool(user_data.get("ban", 0))
+    return user.ban
 
 async def save_user_consent(user_id: str) -> bool:
     """Сохраняем факт согласия пользователя"""
     #try:
-    data = read_json_file(PATH_TO_USERS_FILE)
     from datetime import datetime
-    if user_id in data:
-        data[user_id]["consent_accepted"] = datetime.now().isoformat()
-        
-        write_json_file(PATH_TO_USERS_FILE, data)
-        return True
-    return False
+    async with locks.lock(locks.user(user_id)), store.edit(PATH_TO_USERS_FILE) as users:
+        if user_id not in users.data:
+            return False
+        users.set((user_id, "consent_accepted"), datetime.now().isoformat())
+    return True
     #except Exception as e:
     #    return False
 
 async def check_new_user(user_id: str) -> bool:
     """Определяем нового пользователя"""
     try:
-        data = read_json_file(PATH_TO_USERS_FILE)
-        
-        if user_id in data:
-            if data[user_id]["name"] == "Не указано":
-                return True
-
-        return False
+        user = await get_user(user_id)
+        return bool(user and user.is_new)
     except Exception as e:
         return False
 
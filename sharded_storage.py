@@ -0,0 +1,204 @@
+import os
+import json
+import logging
+from urllib.parse import quote, unquote
+from typing import Any, Dict, List, Optional, Tuple
+import config
+import journal
+import serializers
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+from store import CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# data/users/<id>.json, data/projects/<category>/<id>.json и data/manifest.json
+PATH_TO_DATA_FOLDER = getattr(config, "PATH_TO_DATA_FOLDER", "data")
+USERS_FOLDER = os.path.join(PATH_TO_DATA_FOLDER, "users")
+PROJECTS_FOLDER = os.path.join(PATH_TO_DATA_FOLDER, "projects")
+MANIFEST_FILE = os.path.join(PATH_TO_DATA_FOLDER, "manifest.json")
+LAYOUT_VERSION = 1
+
+EntityWrite = Tuple[str, Optional[str]]  # (путь к файлу сущности, текст или None - удалить)
+
+def _file_name(key: str) -> str:
+    return quote(str(key), safe="") + ".json"
+
+def _key(file_name: str) -> str:
+    return unquote(file_name[:-len(".json")])
+
+def user_path(user_id: str) -> str:
+    return os.path.join(USERS_FOLDER, _file_name(user_id))
+
+def category_path(category: str) -> str:
+    return os.path.join(PROJECTS_FOLDER, quote(category, safe=""))
+
+def project_path(category: str, project_id: str) -> str:
+    return os.path.join(category_path(category), _file_name(project_id))
+
+# ---------- Манифест ----------
+
+def read_manifest() -> Dict[str, Any]:
+    """Версия раскладки и список категорий"""
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def _write_manifest(categories: List[str]):
+    manifest = {"version": LAYOUT_VERSION, "categories": list(categories)}
+    _write_file(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=4))
+
+def counts() -> Tuple[int, int]:
+    """Количество файлов пользователей и проектов"""
+    users = len(_entity_files(USERS_FOLDER))
+    projects = sum(len(_entity_files(category_path(category))) for category in _categories())
+    return users, projects
+
+# ---------- Чтение ----------
+
+def _entity_files(folder: str) -> List[str]:
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder) if name.endswith(".json"))
+
+def _categories() -> List[str]:
+    categories = list(read_manifest().get("categories", CATEGORIES))
+    if os.path.isdir(PROJECTS_FOLDER):
+        for name in sorted(os.listdir(PROJECTS_FOLDER)):
+            category = unquote(name)
+            if category not in categories and os.path.isdir(os.path.join(PROJECTS_FOLDER, name)):
+                categories.append(category)
+    return categories
+
+def _read_folder(folder: str) -> Dict[str, Any]:
+    entities = {}
+    for name in _entity_files(folder):
+        with open(os.path.join(folder, name), 'r', encoding='utf-8') as file:
+            entities[_key(name)] = json.load(file)
+    return entities
+
+def load(file_path: str) -> Dict[str, Any]:
+    """Собрать словарь в формате users.json / projects.json из файлов сущностей"""
+    if file_path == PATH_TO_USERS_FILE:
+        return _read_folder(USERS_FOLDER)
+    return {category: _read_folder(category_path(category)) for category in _categories()}
+
+# ---------- Запись ----------
+
+def _write_file(path: str, text: str):
+    """Атомарная запись одного файла"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+def _dump(entity: Any) -> str:
+    return json.dumps(entity, ensure_ascii=False, indent=4)
+
+def collect_writes(file_path: str, data: Dict[str, Any], changes) -> List[EntityWrite]:
+    """Какие файлы сущностей нужно перезаписать после изменений.
+
+    Вызывается в event loop, пока data не изменились: сущности маленькие,
+    а запись на диск (write_entities) можно выполнить в другом потоке.
+    """
+    writes = {}
+    if file_path == PATH_TO_USERS_FILE:
+        for _, path, _ in changes:
+            user_id = str(path[0])
+            user = data.get(user_id)
+            writes[user_path(user_id)] = _dump(user) if user is not None else None
+        return list(writes.items())
+
+    for _, path, _ in changes:
+        category = path[0]
+        projects = data.get(category)
+        if len(path) == 1:
+            # Категория целиком: удалить файлы, которых больше нет, записать остальные
+            writes[category_path(category)] = None
+            for project_id, project in (projects or {}).items():
+                writes[project_path(category, str(project_id))] = _dump(project)
+            continue
+        project_id = str(path[1])
+        project = projects.get(project_id) if projects is not None else None
+        writes[project_path(category, project_id)] = _dump(project) if project is not None else None
+    return list(writes.items())
+
+def write_entities(writes: List[EntityWrite]) -> bool:
+    """Записать или удалить файлы сущностей"""
+    try:
+        for path, text in writes:
+            if text is not None:
+                _write_file(path, text)
+            elif path.endswith(".json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            else:
+                # Папка (пользователей или категории) без текста - убрать из неё лишние файлы
+                _clear_category(path, {target for target, _ in writes})
+        new_categories = [unquote(os.path.basename(os.path.dirname(path))) for path, text in writes
+                          if text is not None and os.path.dirname(os.path.dirname(path)) == PROJECTS_FOLDER]
+        categories = read_manifest().get("categories")
+        if categories is not None and any(category not in categories for category in new_categories):
+            _write_manifest(categories + [c for c in dict.fromkeys(new_categories) if c not in categories])
+        return True
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"❌ Ошибка записи файлов данных: {e}")
+        return False
+
+def _clear_category(folder: str, keep: set):
+    """Удалить из папки файлы сущностей, которые не будут перезаписаны"""
+    if not os.path.isdir(folder):
+        return
+    for name in _entity_files(folder):
+        path = os.path.join(folder, name)
+        if path not in keep:
+            os.remove(path)
+
+def replace_all(file_path: str, data: Dict[str, Any]) -> bool:
+    """Полностью заменить файлы сущностей данными словаря"""
+    if file_path == PATH_TO_USERS_FILE:
+        writes = [(USERS_FOLDER, None)]
+        writes.extend((user_path(str(user_id)), _dump(user)) for user_id, user in data.items())
+        return write_entities(writes)
+
+    writes = []
+    categories = list(dict.fromkeys(list(read_manifest().get("categories", CATEGORIES)) + list(data)))
+    for category in _categories():
+        if category not in data:
+            writes.append((category_path(category), None))
+    for category, projects in data.items():
+        writes.append((category_path(category), None))
+        writes.extend((project_path(category, str(project_id)), _dump(project))
+                      for project_id, project in projects.items())
+    try:
+        _write_manifest(categories)
+    except OSError as e:
+        logger.error(f"❌ Ошибка записи файлов данных: {e}")
+        return False
+    return write_entities(writes)
+
+def migrate_json_files() -> bool:
+    """Разовый перенос users.json и projects.json в раскладку по файлам"""
+    from utils import apply_change
+    for file_path in (PATH_TO_PROJECTS_FILE, PATH_TO_USERS_FILE):
+        if not os.path.exists(file_path):
+            logger.warning(f"📁 Файл не найден, пропускаю: {file_path}")
+            continue
+        data = serializers.load_file(file_path)
+        # Изменения из журнала, ещё не перенесённые в файл (JOURNAL_MODE)
+        for change in journal.read(file_path):
+            apply_change(data, change)
+        if not replace_all(file_path, data):
+            return False
+    users, projects = counts()
+    logger.info(f"✅ Перенос завершён: {users} пользователей, {projects} проектов в {PATH_TO_DATA_FOLDER}")
+    return True
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrate_json_files()
@@ -0,0 +1,285 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, Tuple
+import config
+import journal
+import serializers
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+from store import CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+PATH_TO_DATABASE_FILE = getattr(config, "PATH_TO_DATABASE_FILE", "data.db")
+
+DEFAULT_ROLE = "участник"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    score INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    category TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (category, id)
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'участник',
+    PRIMARY KEY (user_id, category, project_id)
+);
+CREATE INDEX IF NOT EXISTS memberships_by_project ON memberships (category, project_id);
+"""
+
+_connection = None
+# Соединение общее для event loop и потока хранилища
+_lock = threading.RLock()
+
+def connect() -> sqlite3.Connection:
+    """Открыть (один раз) соединение с базой в режиме WAL"""
+    global _connection
+    if _connection is None:
+        directory = os.path.dirname(PATH_TO_DATABASE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _connection = sqlite3.connect(PATH_TO_DATABASE_FILE, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+        _connection.executescript(_SCHEMA)
+    return _connection
+
+def counts() -> Tuple[int, int]:
+    """Количество пользователей и проектов в базе"""
+    with _lock:
+        conn = connect()
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        projects = conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+    return users, projects
+
+# ---------- Чтение ----------
+
+def load(file_path: str) -> Dict[str, Any]:
+    """Собрать словарь в формате users.json / projects.json из таблиц"""
+    with _lock:
+        conn = connect()
+        if file_path == PATH_TO_USERS_FILE:
+            users = {}
+            for user_id, score, raw in conn.execute("SELECT id, score, data FROM users ORDER BY rowid"):
+                user = json.loads(raw)
+                user["score"] = score
+                user["active_projects"] = []
+                users[user_id] = user
+            for user_id, category, project_id in conn.execute(
+                    "SELECT user_id, category, project_id FROM memberships ORDER BY rowid"):
+                if user_id in users:
+                    users[user_id]["active_projects"].append(f"{category}:::{project_id}")
+            return users
+
+        projects = {category: {} for category in CATEGORIES}
+        for category, project_id, raw in conn.execute("SELECT category, id, data FROM projects ORDER BY rowid"):
+            project = json.loads(raw)
+            project["members"] = {}
+            projects.setdefault(category, {})[project_id] = project
+        for user_id, category, project_id, role in conn.execute(
+                "SELECT user_id, category, project_id, role FROM memberships ORDER BY rowid"):
+            project = projects.get(category, {}).get(project_id)
+            if project is not None:
+                project["members"][user_id] = {"role": role}
+        return projects
+
+# ---------- Запись ----------
+
+def _json_path(key: str) -> str:
+    return '$."' + str(key).replace('"', '\\"') + '"'
+
+def _put_user(conn, user_id: str, user: Dict[str, Any]):
+    fields = {k: v for k, v in user.items() if k not in ("score", "active_projects")}
+    conn.execute(
+        "INSERT INTO users (id, score, data) VALUES (?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET score = excluded.score, data = excluded.data",
+        (user_id, int(user.get("score", 0)), json.dumps(fields, ensure_ascii=False))
+    )
+    _sync_user_memberships(conn, user_id, user.get("active_projects", []))
+
+def _sync_user_memberships(conn, user_id: str, active_projects: Iterable[str]):
+    wanted = []
+    for project_value in active_projects:
+        try:
+            category, project_id = project_value.split(":::")
+        except ValueError:
+            continue
+        wanted.append((category, project_id))
+    current = set(conn.execute(
+        "SELECT category, project_id FROM memberships WHERE user_id = ?", (user_id,)))
+    for category, project_id in current - set(wanted):
+        conn.execute("DELETE FROM memberships WHERE user_id = ? AND category = ? AND project_id = ?",
+                     (user_id, category, project_id))
+    for category, project_id in wanted:
+        conn.execute("INSERT OR IGNORE INTO memberships (user_id, category, project_id) VALUES (?, ?, ?)",
+                     (user_id, category, project_id))
+
+def _put_project(conn, category: str, project_id: str, project: Dict[str, Any]):
+    fields = {k: v for k, v in project.items() if k != "members"}
+    conn.execute(
+        "INSERT INTO projects (category, id, data) VALUES (?, ?, ?) "
+        "ON CONFLICT(category, id) DO UPDATE SET data = excluded.data",
+        (category, project_id, json.dumps(fields, ensure_ascii=False))
+    )
+    _sync_project_members(conn, category, project_id, project.get("members", {}))
+
+def _sync_project_members(conn, category: str, project_id: str, members: Dict[str, Any]):
+    current = {row[0] for row in conn.execute(
+        "SELECT user_id FROM memberships WHERE category = ? AND project_id = ?", (category, project_id))}
+    for user_id in current - set(members):
+        conn.execute("DELETE FROM memberships WHERE user_id = ? AND category = ? AND project_id = ?",
+                     (user_id, category, project_id))
+    for user_id, member in members.items():
+        _put_membership(conn, user_id, category, project_id, member)
+
+def _put_membership(conn, user_id: str, category: str, project_id: str, member: Any):
+    role = member.get("role", DEFAULT_ROLE) if isinstance(member, dict) else DEFAULT_ROLE
+    conn.execute(
+        "INSERT INTO memberships (user_id, category, project_id, role) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(user_id, category, project_id) DO UPDATE SET role = excluded.role",
+        (user_id, category, project_id, role)
+    )
+
+def _delete_project(conn, category: str, project_id: str):
+    conn.execute("DELETE FROM projects WHERE category = ? AND id = ?", (category, project_id))
+    conn.execute("DELETE FROM memberships WHERE category = ? AND project_id = ?", (category, project_id))
+
+def _apply_user_change(conn, op: str, path: Tuple, value: Any):
+    user_id = str(path[0])
+    if len(path) == 1:
+        if op == "set":
+            _put_user(conn, user_id, value)
+        elif op == "delete":
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            conn.execute("DELETE FROM memberships WHERE user_id = ?", (user_id,))
+        return
+
+    field = path[1]
+    if field == "score":
+        conn.execute("UPDATE users SET score = ? WHERE id = ?", (int(value or 0) if op == "set" else 0, user_id))
+    elif field == "active_projects":
+        if op == "set":
+            _sync_user_memberships(conn, user_id, value)
+        else:
+            category, project_id = value.split(":::")
+            if op == "add":
+                conn.execute("INSERT OR IGNORE INTO memberships (user_id, category, project_id) VALUES (?, ?, ?)",
+                             (user_id, category, project_id))
+            elif op == "discard":
+                conn.execute("DELETE FROM memberships WHERE user_id = ? AND category = ? AND project_id = ?",
+                             (user_id, category, project_id))
+    elif op == "set":
+        conn.execute("UPDATE users SET data = json_set(data, ?, json(?)) WHERE id = ?",
+                     (_json_path(field), json.dumps(value, ensure_ascii=False), user_id))
+    elif op == "delete":
+        conn.execute("UPDATE users SET data = json_remove(data, ?) WHERE id = ?", (_json_path(field), user_id))
+
+def _apply_project_change(conn, op: str, path: Tuple, value: Any):
+    category = path[0]
+    if len(path) == 1:
+        for (project_id,) in conn.execute("SELECT id FROM projects WHERE category = ?", (category,)).fetchall():
+            _delete_project(conn, category, project_id)
+        if op == "set":
+            for project_id, project in value.items():
+                _put_project(conn, category, project_id, project)
+        return
+
+    project_id = str(path[1])
+    if len(path) == 2:
+        if op == "set":
+            _put_project(conn, category, project_id, value)
+        elif op == "delete":
+            _delete_project(conn, category, project_id)
+        return
+
+    field = path[2]
+    if field == "members":
+        if len(path) == 3:
+            _sync_project_members(conn, category, project_id, value if op == "set" else {})
+        elif op == "set":
+            _put_membership(conn, str(path[3]), category, project_id, value)
+        elif op == "delete":
+            conn.execute("DELETE FROM memberships WHERE user_id = ? AND category = ? AND project_id = ?",
+                         (str(path[3]), category, project_id))
+    elif op == "set":
+        conn.execute("UPDATE projects SET data = json_set(data, ?, json(?)) WHERE category = ? AND id = ?",
+                     (_json_path(field), json.dumps(value, ensure_ascii=False), category, project_id))
+    elif op == "delete":
+        conn.execute("UPDATE projects SET data = json_remove(data, ?) WHERE category = ? AND id = ?",
+                     (_json_path(field), category, project_id))
+
+def apply_changes(file_path: str, changes) -> bool:
+    """Применить список изменений (op, path, value) одной транзакцией"""
+    return apply_changes_batch([(file_path, changes)])
+
+def apply_changes_batch(items) -> bool:
+    """Применить изменения нескольких файлов [(file_path, changes), ...] одной транзакцией"""
+    with _lock:
+        conn = connect()
+        try:
+            with conn:
+                for file_path, changes in items:
+                    apply = _apply_user_change if file_path == PATH_TO_USERS_FILE else _apply_project_change
+                    for op, path, value in changes:
+                        apply(conn, op, tuple(path), value)
+            return True
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            logger.error(f"❌ Ошибка записи в базу: {e}")
+            return False
+
+def replace_all(file_path: str, data: Dict[str, Any]) -> bool:
+    """Полностью заменить содержимое таблиц данными словаря"""
+    with _lock:
+        conn = connect()
+        try:
+            with conn:
+                if file_path == PATH_TO_USERS_FILE:
+                    stale = {row[0] for row in conn.execute("SELECT id FROM users")} - set(data)
+                    for user_id in stale:
+                        _apply_user_change(conn, "delete", (user_id,), None)
+                    for user_id, user in data.items():
+                        _put_user(conn, str(user_id), user)
+                else:
+                    existing = set(conn.execute("SELECT category, id FROM projects"))
+                    wanted = {(category, str(project_id)) for category in data for project_id in data[category]}
+                    for category, project_id in existing - wanted:
+                        _delete_project(conn, category, project_id)
+                    for category, projects in data.items():
+                        for project_id, project in projects.items():
+                            _put_project(conn, category, str(project_id), project)
+            return True
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            logger.error(f"❌ Ошибка записи в базу: {e}")
+            return False
+
+def import_json_files() -> bool:
+    """Разовый перенос users.json и projects.json в базу SQLite"""
+    from utils import apply_change
+    for file_path in (PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE):
+        if not os.path.exists(file_path):
+            logger.warning(f"📁 Файл не найден, пропускаю: {file_path}")
+            continue
+        data = serializers.load_file(file_path)
+        # Изменения из журнала, ещё не перенесённые в файл (JOURNAL_MODE)
+        for change in journal.read(file_path):
+            apply_change(data, change)
+        if not replace_all(file_path, data):
+            return False
+    users, projects = counts()
+    logger.info(f"✅ Импорт завершён: {users} пользователей, {projects} проектов")
+    return True
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    import_json_files()
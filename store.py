@@ -0,0 +1,210 @@
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+from utils import read_json_file, read_json_file_async, save_changes_batch, Change
+
+# Данные из кэша отдаются читателям как неизменяемые снимки: FrozenDict/FrozenList
+# ведут себя как dict/list (в том числе для json.dumps), но запрещают изменения.
+# Изменения делаются только через edit(): меняются копии узлов на пути к изменённому
+# значению, остальное дерево общее со старым снимком, а новый снимок публикуется
+# в кэш целиком при сохранении.
+# Раз узлы не меняются, freeze() хранит одинаковые строки снимка (ключи, имена,
+# роли, "Не указано") одним объектом, а все пустые списки - одним общим списком.
+
+# Категории проектов: ключи верхнего уровня projects
+CATEGORIES = ("education", "science", "profession", "culture", "volunteering", "patriotism", "sport", "other")
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} нельзя изменять, используйте store.edit()")
+
+class FrozenDict(dict):
+    """Неизменяемый dict для снимков данных"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self):
+        return dict.__repr__(self)
+
+class FrozenList(list):
+    """Неизменяемый list для снимков данных"""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __repr__(self):
+        return list.__repr__(self)
+
+_EMPTY_LIST = FrozenList()
+
+def freeze(value: Any) -> Any:
+    """Неизменяемая копия значения (уже замороженные узлы не копируются)"""
+    return _freeze(value, {})
+
+def _freeze(value: Any, strings: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return strings.setdefault(value, value)
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({_freeze(key, strings): _freeze(item, strings) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return _EMPTY_LIST
+        return FrozenList([_freeze(item, strings) for item in value])
+    return value
+
+class Edit:
+    """Изменения одного файла данных поверх снимка"""
+
+    def __init__(self, file_path: str, base: Dict[str, Any]):
+        self.file_path = file_path
+        self.base = base
+        self.data = base
+        self.changes: List[Change] = []
+        self.saved = False
+        # Узлы, скопированные в этой правке: их можно менять на месте
+        self._owned = {}
+
+    def set(self, path: Tuple, value: Any):
+        self._record(("set", tuple(path), value))
+
+    def delete(self, path: Tuple):
+        self._record(("delete", tuple(path), None))
+
+    def add(self, path: Tuple, value: Any):
+        """Добавить значение в список, если его там нет"""
+        self._record(("add", tuple(path), value))
+
+    def discard(self, path: Tuple, value: Any):
+        """Убрать значение из списка, если оно там есть"""
+        self._record(("discard", tuple(path), value))
+
+    def _record(self, change: Change):
+        self.changes.append(change)
+        self._apply(change)
+
+    def _own(self, node):
+        if id(node) in self._owned:
+            return node
+        node = FrozenDict(node) if isinstance(node, dict) else FrozenList(node)
+        self._owned[id(node)] = node
+        return node
+
+    def _apply(self, change: Change):
+        """То же, что utils.apply_change, но с копированием узлов на пути"""
+        op, path, value = change
+        parent = self.data = self._own(self.data)
+        for key in path[:-1]:
+            child = parent.get(key)
+            if not isinstance(child, dict):
+                return
+            child = self._own(child)
+            dict.__setitem__(parent, key, child)
+            parent = child
+        key = path[-1]
+
+        if op == "set":
+            dict.__setitem__(parent, key, freeze(value))
+        elif op == "delete":
+            dict.pop(parent, key, None)
+        elif op == "add":
+            items = self._own(parent.get(key, FrozenList()))
+            if value not in items:
+                list.append(items, freeze(value))
+            dict.__setitem__(parent, key, items)
+        elif op == "discard":
+            items = parent.get(key, FrozenList())
+            if value in items:
+                items = self._own(items)
+                list.remove(items, value)
+                dict.__setitem__(parent, key, items)
+
+    def rebase(self, base: Dict[str, Any]):
+        """Перенести изменения на более свежий снимок"""
+        changes = self.changes
+        self.base = self.data = base
+        self.changes = []
+        self._owned = {}
+        for change in changes:
+            self._record(change)
+
+    def _committed(self, saved: bool):
+        self.saved = saved
+        self.changes = []
+        self.base = self.data
+        self._owned = {}
+
+    async def commit(self) -> bool:
+        """Опубликовать новый снимок и сохранить изменения"""
+        return await _commit([self])
+
+async def _commit(edits: List[Edit]) -> bool:
+    pending = [tx for tx in edits if tx.changes]
+    for tx in pending:
+        await read_json_file_async(tx.file_path)
+    # Дальше без await: снимки сверяются, переносятся и публикуются за один шаг
+    for tx in pending:
+        current = read_json_file(tx.file_path)
+        if current is not tx.base:
+            # Пока шла правка, файл сохранила другая правка
+            tx.rebase(current)
+    saved = await save_changes_batch([(tx.file_path, tx.data, tx.changes) for tx in pending])
+    for tx in edits:
+        tx._committed(saved)
+    return saved
+
+class Transaction:
+    """Изменения пользователей и проектов, сохраняемые вместе"""
+
+    def __init__(self, users: Edit, projects: Edit):
+        self.users = users
+        self.projects = projects
+        self.saved = False
+
+    async def commit(self) -> bool:
+        self.saved = await _commit([self.users, self.projects])
+        return self.saved
+
+@asynccontextmanager
+async def edit(file_path: str):
+    """Правка файла данных: `async with store.edit(PATH) as users: users.set(...)`.
+
+    Внутри блока users.data - снимок с уже внесёнными изменениями, остальные
+    обработчики видят старый снимок до выхода из блока. При исключении
+    изменения отбрасываются. Результат сохранения - в users.saved.
+    """
+    tx = Edit(file_path, await read_json_file_async(file_path))
+    yield tx
+    await tx.commit()
+
+@asynccontextmanager
+async def transaction():
+    """Транзакция: `async with store.transaction() as tx: tx.users.set(...); tx.projects.delete(...)`.
+
+    Все изменения обоих файлов публикуются вместе при выходе из блока,
+    и каждый файл записывается один раз. Результат - в tx.saved.
+    """
+    users = Edit(PATH_TO_USERS_FILE, await read_json_file_async(PATH_TO_USERS_FILE))
+    projects = Edit(PATH_TO_PROJECTS_FILE, await read_json_file_async(PATH_TO_PROJECTS_FILE))
+    tx = Transaction(users, projects)
+    yield tx
+    await tx.commit()
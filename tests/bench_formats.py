@@ -0,0 +1,30 @@
+"""Замер форматов файлов данных (serializers): время записи и разбора и размер
+users.json на синтетических пользователях. Недоступные форматы пропускаются.
+
+    python tests/bench_formats.py [20000]
+"""
+from benchmark import synthetic_users, timed, Table, run
+
+import serializers
+
+FORMATS = ("json", "json-compact", "orjson", "msgpack")
+COMPRESSIONS = (None, "gzip", "zstd")
+REPEATS = 3
+
+def bench(count: int):
+    users = synthetic_users(count)
+    print(f"{count} пользователей")
+    table = Table(("формат", 22), ("запись, мс", 12, ".1f"), ("разбор, мс", 12, ".1f"), ("размер, КБ", 12, ".0f"))
+    for data_format in FORMATS:
+        for compression in COMPRESSIONS:
+            name = f"{data_format}+{compression}" if compression else data_format
+            if not serializers.is_available(data_format, compression):
+                table.row(name, "недоступен")
+                continue
+            raw, dump_seconds = timed(lambda: serializers.dumps(users, data_format, compression), REPEATS)
+            loaded, load_seconds = timed(lambda: serializers.loads(raw), REPEATS)
+            assert loaded == users
+            table.row(name, dump_seconds * 1000, load_seconds * 1000, len(raw) / 1024)
+
+if __name__ == "__main__":
+    run(bench, 20000)
@@ -0,0 +1,50 @@
+"""Замер клавиатур на одно обновление: новая InlineKeyboardMarkup на каждый вызов
+(как было до кэширования) против готовой из keyboards.
+
+    python tests/bench_keyboards.py [10000]
+"""
+import asyncio
+import tracemalloc
+from benchmark import timed, Table, run
+
+import keyboards
+
+def _cases():
+    """(название, построить заново, получить из keyboards)"""
+    cases = [(name, build, getattr(keyboards, name)) for name, build in keyboards._static_builders.items()]
+    cases.append(("get_leaderboard_kb",
+                  lambda: keyboards._leaderboard_kb.__wrapped__(2, 10, True),
+                  lambda: keyboards.get_leaderboard_kb(2, 10, True)))
+    cases.append(("get_my_data_menu_kb",
+                  lambda: keyboards._my_data_menu_kb.__wrapped__(False),
+                  lambda: keyboards.get_my_data_menu_kb()))
+    return cases
+
+async def _calls(get, calls: int, is_async: bool):
+    return [await get() if is_async else get() for _ in range(calls)]
+
+def _measure(loop, get, calls: int, is_async: bool):
+    """Время одного вызова (мкс) и память, выделенная за вызов (байт)"""
+    _, seconds = timed(lambda: loop.run_until_complete(_calls(get, calls, is_async)))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = loop.run_until_complete(_calls(get, 100, is_async))
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return seconds / calls * 1e6, allocated / 100
+
+def bench(calls: int):
+    keyboards.warm_up()
+    loop = asyncio.new_event_loop()
+    table = Table(("клавиатура", 32), ("заново, мкс", 12, ".1f"), ("из кэша, мкс", 13, ".2f"),
+                  ("заново, Б", 10, ".0f"), ("из кэша, Б", 11, ".0f"))
+    for name, build, get in _cases():
+        build_us, build_bytes = _measure(loop, build, calls, False)
+        cached_us, cached_bytes = _measure(loop, get, calls, True)
+        table.row(name, build_us, cached_us, build_bytes, cached_bytes)
+    loop.close()
+
+if __name__ == "__main__":
+    run(bench, 10000)
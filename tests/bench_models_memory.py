@@ -0,0 +1,46 @@
+"""Замер памяти users на синтетических пользователях: dict-of-dicts, как его
+отдавал json.load до снимков, против снимка store.freeze(), для users.json целиком
+и для построчной загрузки sqlite/sharded (json.loads на каждого пользователя).
+Модели (models.py) строятся по узлу снимка при обращении и памяти не занимают.
+
+    python tests/bench_models_memory.py [10000]
+"""
+import json
+import tracemalloc
+from benchmark import synthetic_users, timed, Table, run
+
+import models
+from store import freeze
+
+def _retained(build) -> int:
+    """Память, которую занимает результат build() (байт)"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+def bench(count: int):
+    users = synthetic_users(count)
+    unique_names = {user_id: dict(user, name=f"Имя{i}", surname=f"Фамилия{i}")
+                    for i, (user_id, user) in enumerate(users.items())}
+    mb = 1024 * 1024
+    print(f"{count} пользователей")
+    table = Table(("данные", 44), ("dict, МБ", 10, ".1f"), ("снимок, МБ", 12, ".1f"), ("экономия", 10, ".0%"))
+    for label, data in (("users.json", users), ("users.json, все имена разные", unique_names)):
+        raw = json.dumps(data, ensure_ascii=False)
+        rows = [json.dumps([user_id, user], ensure_ascii=False) for user_id, user in data.items()]
+        for source, load in ((label, lambda: json.loads(raw)),
+                             (f"{label} построчно", lambda: dict(json.loads(row) for row in rows))):
+            plain = _retained(load)
+            frozen = _retained(lambda: freeze(load()))
+            table.row(source, plain / mb, frozen / mb, 1 - frozen / plain)
+
+    users_data = freeze(users)
+    user_ids = list(users_data)
+    _, seconds = timed(lambda: [models.user(users_data, user_id) for user_id in user_ids])
+    print(f"модель по запросу: {seconds / count * 1e6:.1f} мкс на пользователя, в памяти не хранится")
+
+if __name__ == "__main__":
+    run(bench, 10000)
@@ -0,0 +1,53 @@
+"""Замер: стоимость записи одного вступления в проект (пользователь + проект)
+для users.json/projects.json целиком и для раскладки по файлам (sharded_storage).
+
+    python tests/bench_sharded_writes.py [1000 10000 50000]
+"""
+from benchmark import synthetic_users, timed, Table, run
+
+import utils
+import sharded_storage
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+
+REPEATS = 5
+
+def _projects(users, count=200):
+    user_ids = list(users)
+    projects = {category: {} for category in sharded_storage.CATEGORIES}
+    for i in range(count):
+        members = user_ids[i * 10:(i + 1) * 10]
+        projects["other"][str(i)] = {"name": f"Проект {i}", "max_members": 100,
+                                     "members": {user_id: {"role": "участник"} for user_id in members}}
+    return projects
+
+def _join(users, projects, i):
+    user_id = list(users)[i]
+    users[user_id]["active_projects"].append(f"other:::{i}")
+    projects["other"][str(i)]["members"][user_id] = {"role": "участник"}
+    return user_id
+
+def _write_json(users, projects):
+    utils._write_json_now(PATH_TO_USERS_FILE, users)
+    utils._write_json_now(PATH_TO_PROJECTS_FILE, projects)
+
+def bench(count: int, table: Table):
+    users = synthetic_users(count)
+    projects = _projects(users)
+    sharded_storage.replace_all(PATH_TO_USERS_FILE, users)
+    sharded_storage.replace_all(PATH_TO_PROJECTS_FILE, projects)
+
+    json_seconds = sharded_seconds = None
+    for i in range(REPEATS):
+        user_id = _join(users, projects, i)
+        _, seconds = timed(lambda: _write_json(users, projects))
+        json_seconds = seconds if json_seconds is None else min(json_seconds, seconds)
+        writes = (sharded_storage.collect_writes(PATH_TO_USERS_FILE, users, [("add", (user_id, "active_projects"), None)]) +
+                  sharded_storage.collect_writes(PATH_TO_PROJECTS_FILE, projects, [("set", ("other", str(i), "members", user_id), None)]))
+        _, seconds = timed(lambda: sharded_storage.write_entities(writes))
+        sharded_seconds = seconds if sharded_seconds is None else min(sharded_seconds, seconds)
+
+    table.row(count, json_seconds * 1000, sharded_seconds * 1000, json_seconds / sharded_seconds)
+
+if __name__ == "__main__":
+    table = Table(("пользователей", 14), ("json, мс", 10, ".1f"), ("sharded, мс", 13, ".1f"), ("быстрее, раз", 14, ".0f"))
+    run(lambda count: bench(count, table), 1000, 10000, 50000)
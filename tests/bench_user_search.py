@@ -0,0 +1,57 @@
+"""Замер нечёткого поиска пользователей (/поиск): обход всех пользователей с difflib
+против кандидатов из search_index. Оценка - как в moderation_handlers.fuzzy_user_search.
+
+    python tests/bench_user_search.py [5000 20000 100000]
+"""
+import difflib
+from benchmark import synthetic_users, timed, Table, run
+
+import search_index
+from store import freeze
+
+QUERIES = ("иванов", "мари", "смирнова анна", "user123", "9123", "алесандр")
+
+def _substring(query: str, user_id: str, user_data) -> bool:
+    username = user_data.get("username", "").lower()
+    phone = search_index.phone_digits(user_data.get("phone", ""))
+    return query in user_id or query in username or query in user_data.get("IDfirst", "").lower() or query in phone
+
+def _score(query: str, user_id: str, user_data) -> int:
+    if _substring(query, user_id, user_data):
+        return 80
+    name, surname = user_data.get("name", "").lower(), user_data.get("surname", "").lower()
+    full_name = f"{name} {surname}".strip()
+    if not full_name:
+        return 0
+    ratio = max(difflib.SequenceMatcher(None, query, full_name).ratio(),
+                difflib.SequenceMatcher(None, query, name).ratio() if name else 0,
+                difflib.SequenceMatcher(None, query, surname).ratio() if surname else 0)
+    return int(ratio * 100) if ratio > 0.3 else 0
+
+def _full_scan(users_data, query):
+    scores = {user_id: _score(query, user_id, user_data) for user_id, user_data in users_data.items()}
+    return sorted(((score, user_id) for user_id, score in scores.items() if score), reverse=True)
+
+def _indexed(users_data, query):
+    scores = {}
+    for user_id in search_index.substring_candidates(users_data, query):
+        if _substring(query, user_id, users_data[user_id]):
+            scores[user_id] = 80
+    for user_id in search_index.name_candidates(users_data, query):
+        if user_id not in scores:
+            scores[user_id] = _score(query, user_id, users_data[user_id])
+    return sorted(((score, user_id) for user_id, score in scores.items() if score), reverse=True)
+
+def bench(count: int):
+    users_data = freeze(synthetic_users(count))
+    _, build_seconds = timed(lambda: search_index._ensure(users_data))
+    print(f"{count} пользователей, построение индекса {build_seconds * 1000:.0f} мс")
+    table = Table(("запрос", 20), ("обход, мс", 11, ".1f"), ("индекс, мс", 12, ".1f"), ("топ-5 оценок", 14))
+    for query in QUERIES:
+        full, full_seconds = timed(lambda: _full_scan(users_data, query))
+        indexed, indexed_seconds = timed(lambda: _indexed(users_data, query))
+        same = [score for score, _ in full[:5]] == [score for score, _ in indexed[:5]]
+        table.row(repr(query), full_seconds * 1000, indexed_seconds * 1000, "совпадает" if same else "РАЗЛИЧАЕТСЯ")
+
+if __name__ == "__main__":
+    run(bench, 5000, 20000, 100000)
@@ -0,0 +1,42 @@
+import sys
+import time
+import support
+from support import synthetic_users
+
+# Общая обвязка замеров tests/bench_*.py: config во временной папке (поэтому
+# benchmark импортируется раньше модулей бота), синтетические пользователи,
+# время вызова и таблица результатов.
+
+support.install_config()
+
+__all__ = ["synthetic_users", "timed", "Table", "run"]
+
+def timed(func, repeats: int = 1):
+    """Результат func и лучшее время вызова из repeats запусков (секунд)"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+class Table:
+    """Таблица результатов: Table(("формат", 22), ("запись, мс", 12, ".1f")).row("json", 12.5)"""
+
+    def __init__(self, *columns):
+        self.columns = [(column + ("",))[:3] for column in columns]
+        print("".join(self._cell(i, title) for i, title in enumerate(title for title, _, _ in self.columns)))
+
+    def _cell(self, i: int, value) -> str:
+        _, width, spec = self.columns[i]
+        text = format(value, spec) if isinstance(value, (int, float)) else str(value)
+        return f"{text:<{width}}" if i == 0 else f"{text:>{width}}"
+
+    def row(self, *values):
+        print("".join(self._cell(i, value) for i, value in enumerate(values)))
+
+def run(bench, *default_counts):
+    """bench(count) для каждого числа из командной строки (или из default_counts)"""
+    for count in map(int, sys.argv[1:] or default_counts):
+        bench(count)
@@ -0,0 +1,70 @@
+import os
+import sys
+import types
+import random
+import tempfile
+from typing import Any, Dict
+
+# Общее окружение для тестов и замеров в tests/: модуль config с данными во
+# временной папке. Модули бота читают config при импорте, поэтому install_config
+# вызывается до импорта utils, services и остальных.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def install_config(data_dir: str = None, **overrides) -> str:
+    """Подставить config с файлами данных в data_dir (по умолчанию - новая временная папка)"""
+    data_dir = data_dir or tempfile.mkdtemp(prefix="movement-first-bot-")
+    config = types.ModuleType("config")
+    config.__dict__.update({
+        "API_TELEGRAM": "",
+        "MODERATORS_CHAT_ID": 0,
+        "SCHOOL_AUTH_PSWD": "",
+        "PATH_TO_USERS_FILE": os.path.join(data_dir, "users.json"),
+        "PATH_TO_PROJECTS_FILE": os.path.join(data_dir, "projects.json"),
+        "MEDIA_FOLDER_NAME": os.path.join(data_dir, "media"),
+        "PATH_TO_DATABASE_FILE": os.path.join(data_dir, "data.db"),
+        "PATH_TO_DATA_FOLDER": os.path.join(data_dir, "data"),
+        "NON_DISPLAY_CHARACTER": "⁣",
+        "POLLING_TIMEOUT": 30,
+        "REWARD_COEFFICIENT_FOR_THE_PHOTO": 0.1,
+        "USER_IN_LEADERBOARD": 10,
+        "MEMBERS_IN_MEMBERSLIST": 5,
+        "NOT_AUTHORIZED_MESSAGE": "",
+        "NOT_MODERATOR_MESSAGE": "",
+        "CONSENT_TEXT": "",
+        "GREETING_TEXT": "",
+    })
+    config.__dict__.update(overrides)
+    sys.modules["config"] = config
+    return data_dir
+
+_NAMES = ["Александр", "Мария", "Иван", "Анна", "Дмитрий", "Елена", "Сергей", "Ольга", "Артём", "Софья"]
+_SURNAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров"]
+
+def synthetic_users(count: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """users.json на count пользователей с правдоподобными полями"""
+    rng = random.Random(seed)
+    users = {}
+    for i in range(count):
+        user_id = str(1_000_000_000 + i)
+        users[user_id] = {
+            "username": f"@user{i}",
+            "name": rng.choice(_NAMES),
+            "surname": rng.choice(_SURNAMES) + rng.choice(["", "а"]),
+            "IDfirst": f"{rng.randrange(10**9):09d}",
+            "phone": f"+7-9{rng.randrange(10**2):02d}-{rng.randrange(10**3):03d}-{rng.randrange(10**2):02d}-{rng.randrange(10**2):02d}",
+            "score": rng.randrange(0, 500),
+            "completed_projects": rng.randrange(0, 20),
+            "active_projects": [],
+            "ban": 0,
+            "consent_accepted": True,
+        }
+    return users
+
+def publish(edit) -> Dict[str, Any]:
+    """Разослать изменения store.Edit подписчикам, как после сохранения, но без записи на диск"""
+    import utils
+    utils._notify_listeners(edit.file_path, edit.base, edit.data, edit.changes)
+    return edit.data
@@ -0,0 +1,78 @@
+import asyncio
+import journal
+import serializers
+import store
+import utils
+
+def _data_file(tmp_path, data=None):
+    file_path = str(tmp_path / "users.json")
+    if data is not None:
+        assert utils._write_json_now(file_path, data)
+    return file_path
+
+def test_read_skips_torn_last_line(tmp_path):
+    file_path = _data_file(tmp_path)
+    assert journal.append(file_path, [("set", ("1", "score"), 5), ("add", ("1", "active_projects"), "other:::1")])
+    with open(journal.journal_path(file_path), "a", encoding="utf-8") as file:
+        file.write('["set", ["1", "sco')
+    assert journal.read(file_path) == [("set", ("1", "score"), 5), ("add", ("1", "active_projects"), "other:::1")]
+
+def test_replay_applies_journal_and_compacts(tmp_path):
+    file_path = _data_file(tmp_path, {"1": {"score": 1, "active_projects": []}, "2": {"score": 2}})
+    journal.append(file_path, [("set", ("1", "score"), 10), ("delete", ("2",), None)])
+    journal.append(file_path, [("add", ("1", "active_projects"), "other:::1"), ("set", ("3",), {"score": 3})])
+    expected = {"1": {"score": 10, "active_projects": ["other:::1"]}, "3": {"score": 3}}
+
+    assert utils._load_data(file_path) == expected
+    assert utils.compact_journal(file_path)
+    assert not journal.exists(file_path)
+    assert serializers.load_file(file_path) == expected
+    # Повторное применение того же журнала ничего не меняет
+    journal.append(file_path, [("set", ("1", "score"), 10), ("add", ("1", "active_projects"), "other:::1")])
+    assert utils._load_data(file_path) == expected
+    utils.invalidate_cache(file_path)
+
+def test_changes_during_failed_compaction_are_kept(tmp_path):
+    file_path = _data_file(tmp_path, {"1": {"score": 0}})
+    journal.append(file_path, [("set", ("1", "score"), 1)])
+    journal.begin_compaction(file_path)
+    # Снимок ещё пишется (или запись не удалась), а изменения продолжают приходить
+    journal.append(file_path, [("set", ("1", "score"), 2)])
+    assert utils._load_data(file_path) == {"1": {"score": 2}}
+
+    journal.begin_compaction(file_path)
+    journal.append(file_path, [("set", ("2",), {"score": 5})])
+    assert journal.read(file_path) == [("set", ("1", "score"), 1), ("set", ("1", "score"), 2),
+                                       ("set", ("2",), {"score": 5})]
+
+    journal.end_compaction(file_path)
+    assert journal.read(file_path) == [("set", ("2",), {"score": 5})]
+    journal.clear(file_path)
+
+def test_journal_mode_edits_and_async_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "JOURNAL_MODE", True)
+    file_path = _data_file(tmp_path, {"1": {"score": 0}})
+
+    async def main():
+        for score in range(1, 6):
+            async with store.edit(file_path) as users:
+                users.set(("1", "score"), score)
+            assert users.saved
+        assert file_path in journal.pending_files()
+        assert serializers.load_file(file_path) == {"1": {"score": 0}}
+
+        assert await utils.compact_journal_async(file_path)
+        assert not journal.exists(file_path)
+        assert file_path not in journal.pending_files()
+        assert serializers.load_file(file_path) == {"1": {"score": 5}}
+
+        # Без кэша снимок для сжатия читается в потоке хранилища
+        async with store.edit(file_path) as users:
+            users.set(("2",), {"score": 7})
+        utils.invalidate_cache(file_path)
+        assert await utils.compact_journal_async(file_path)
+        assert serializers.load_file(file_path) == {"1": {"score": 5}, "2": {"score": 7}}
+        assert utils.read_json_file(file_path) == {"1": {"score": 5}, "2": {"score": 7}}
+
+    asyncio.run(main())
+    utils.invalidate_cache(file_path)
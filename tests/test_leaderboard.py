@@ -0,0 +1,126 @@
+import random
+import asyncio
+import support
+import utils
+import leaderboard
+from store import Edit, freeze
+from config import PATH_TO_USERS_FILE
+
+def _users(scores):
+    """users 01, 02, ... с именами N1, N2, ... и баллами scores по порядку"""
+    return freeze({f"{i:02d}": {"name": f"N{i}", "surname": "Не указано", "score": score}
+                   for i, score in enumerate(scores, 1)})
+
+def _top(users_data, top_n):
+    lines, _ = asyncio.run(utils._cached_top(users_data, top_n))
+    return [line.split(" - ")[0] for line in lines]
+
+def test_top_numbers_tie_groups_by_shown_places():
+    users_data = _users([100, 90, 90, 80, 70, 60, 50, 40, 30, 30, 30, 30, 20])
+    assert _top(users_data, 10) == [
+        "🥇 N1", "🥈 2-3 N2", "🥈 2-3 N3", "4. N4", "5. N5", "6. N6", "7. N7", "8. N8",
+        # Группа 9-12 обрезана краем топа
+        "9-10 N9", "9-10 N10",
+    ]
+
+def test_top_edge_cuts_group_to_single_place():
+    users_data = _users([100, 90, 80, 80, 80, 70, 60])
+    assert _top(users_data, 3) == ["🥇 N1", "🥈 N2", "🥉 N3"]
+    assert _top(users_data, 4) == ["🥇 N1", "🥈 N2", "🥉 3-4 N3", "🥉 3-4 N4"]
+
+async def _baseline_top(users_data, top_n):
+    """Топ, как его собирал get_leaderboard до рейтинга leaderboard.py (равные баллы - по user_id)"""
+    ordered = sorted(users_data, key=lambda user_id: (-users_data[user_id]["score"], user_id))[:top_n]
+    users = [{"user_name": users_data[user_id]["name"], "score": users_data[user_id]["score"]} for user_id in ordered]
+    result, group, start = [], [], 1
+    for i, user in enumerate(users):
+        if group and user["score"] != group[0]["score"]:
+            result.extend(await utils.format_group(group, start, i))
+            group, start = [], i + 1
+        group.append(user)
+    if group:
+        result.extend(await utils.format_group(group, start, len(users)))
+    return result
+
+def test_top_matches_baseline_rendering():
+    rng = random.Random(3)
+    for _ in range(50):
+        users_data = _users([rng.randrange(6) for _ in range(rng.randrange(1, 25))])
+        for top_n in (1, 3, 10):
+            lines, _ = asyncio.run(utils._cached_top(users_data, top_n))
+            assert lines == asyncio.run(_baseline_top(users_data, top_n))
+
+class _SmallKeys(leaderboard._SortedKeys):
+    LOAD = 3
+
+def test_sorted_keys_match_sorted_list():
+    rng = random.Random(0)
+    keys, oracle = _SmallKeys(), []
+    for _ in range(3000):
+        key = (-rng.randrange(50), str(rng.randrange(200)))
+        if key in oracle and rng.random() < 0.5:
+            keys.remove(key)
+            oracle.remove(key)
+        elif key not in oracle:
+            keys.add(key)
+            oracle.append(key)
+            oracle.sort()
+        probe = (-rng.randrange(50),)
+        assert keys.index(probe) == sum(1 for item in oracle if item < probe)
+        start = rng.randrange(-2, len(oracle) + 2)
+        stop = start + rng.randrange(0, 2 * _SmallKeys.LOAD + 3)
+        assert keys.slice(start, stop) == oracle[max(start, 0):max(stop, 0)]
+        assert len(keys) == len(oracle)
+
+def test_leaderboard_follows_change_feed():
+    rng = random.Random(1)
+    users_data = _users([rng.randrange(20) for _ in range(40)])
+    leaderboard.size(users_data)
+    index = leaderboard._ensure.__self__
+    for step in range(300):
+        edit = Edit(PATH_TO_USERS_FILE, users_data)
+        user_id = str(rng.randrange(1, 50))
+        action = rng.random()
+        if action < 0.6 and user_id in users_data:
+            edit.set((user_id, "score"), users_data[user_id]["score"] + rng.randrange(-5, 6))
+        elif action < 0.8:
+            edit.delete((user_id,))
+        else:
+            edit.set((user_id,), {"name": f"N{user_id}", "score": rng.randrange(20)})
+        users_data = support.publish(edit)
+        # Рейтинг обновлён по записям изменений, а не перестроен
+        assert index.snapshot is users_data
+        expected = sorted((-user["score"], user_id) for user_id, user in users_data.items())
+        assert leaderboard.top(users_data) == [(user_id, -score) for score, user_id in expected]
+        assert all(leaderboard.rank_of(users_data, user_id) == position
+                   for position, (_, user_id) in enumerate(expected, 1))
+
+def _pages(users_data, page_size, around_user=None):
+    async def main():
+        assert await utils.write_json_file_async(PATH_TO_USERS_FILE, users_data)
+        if around_user:
+            text, *_ = await utils.get_leaderboard_around(around_user, page_size)
+            return [text]
+        pages = []
+        for page in range(-(-len(users_data) // page_size)):
+            text, *_ = await utils.get_leaderboard_page(None, page, page_size)
+            pages.append(text)
+        return pages
+    return [[line.split(" - ")[0] for line in text.split("\n")] for text in asyncio.run(main())]
+
+def test_pages_number_tie_groups_by_shown_places():
+    users_data = _users([100, 90, 80, 80, 80, 70, 60])
+    # Группа 3-5 разрезана краем страницы: на каждой странице - только её показанные места
+    assert _pages(users_data, 3) == [["🥇 N1", "🥈 N2", "🥉 N3"], ["4-5 N4", "4-5 N5", "6. N6"], ["7. N7"]]
+    assert _pages(users_data, 4) == [["🥇 N1", "🥈 N2", "🥉 3-4 N3", "🥉 3-4 N4"], ["5. N5", "6. N6", "7. N7"]]
+
+def test_around_window_numbers_tie_groups_by_shown_places():
+    scores = [100 - i for i in range(10)] + [50] * 5 + [40 - i for i in range(10)]
+    users_data = _users(scores)
+    # Окно 8-18 вокруг 13-го места: группа 11-15 видна целиком, место пользователя выделено
+    assert _pages(users_data, 10, around_user="13") == [[
+        "8. N8", "9. N9", "10. N10", "11-15 N11", "11-15 N12", "<b>11-15 N13", "11-15 N14", "11-15 N15",
+        "16. N16", "17. N17", "18. N18",
+    ]]
+    # Окно 1-11 вокруг 6-го места обрезает группу 11-15 до одного показанного места
+    assert _pages(users_data, 10, around_user="06")[0][-2:] == ["10. N10", "11. N11"]
@@ -0,0 +1,42 @@
+import os
+import asyncio
+import ledger
+import services
+import utils
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+
+def _start(users_data):
+    """Файлы users и projects с users_data и журнал с их начальными остатками"""
+    if os.path.exists(ledger.PATH_TO_LEDGER_FILE):
+        os.remove(ledger.PATH_TO_LEDGER_FILE)
+    assert utils._write_json_now(PATH_TO_USERS_FILE, users_data)
+    assert utils._write_json_now(PATH_TO_PROJECTS_FILE, {})
+    utils.invalidate_cache(PATH_TO_USERS_FILE)
+    utils.invalidate_cache(PATH_TO_PROJECTS_FILE)
+    assert ledger.create(users_data)
+
+def test_rebuild_compares_legacy_string_scores_as_numbers():
+    _start({"1": {"score": "15"}, "2": {"score": "7"}, "3": {"score": "abc"}})
+
+    async def main():
+        await services.add_points_to_member("1", 5)
+        return await ledger.rebuild_totals()
+
+    # "1" стал числом 20 после начисления, "2" совпадает с журналом, "3" - не число
+    assert asyncio.run(main()) == 1
+    users_data = utils.read_json_file(PATH_TO_USERS_FILE)
+    assert users_data["1"]["score"] == 20 and users_data["2"]["score"] == "7" and users_data["3"]["score"] == 0
+
+def test_removed_user_does_not_get_old_balance_back():
+    _start({"1": {"score": 40}, "2": {"score": 10}})
+
+    async def main():
+        await services.add_points_to_member("1", 5)
+        assert await services.remove_user("1")
+        assert await services.create_user("1", {"score": 0})
+        await services.add_points_to_member("1", 3)
+        return await ledger.rebuild_totals()
+
+    assert asyncio.run(main()) == 0
+    assert ledger.totals() == {"1": 3, "2": 10}
+    assert utils.read_json_file(PATH_TO_USERS_FILE)["1"]["score"] == 3
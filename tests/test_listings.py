@@ -0,0 +1,17 @@
+import listings
+from store import freeze
+from config import NON_DISPLAY_CHARACTER
+
+def test_labels_show_member_count_without_limit():
+    projects_data = freeze({"other": {
+        "1": {"name": "Лимит", "max_members": 3, "members": {"10": {}, "11": {}}},
+        "2": {"name": "Без лимита", "max_members": None, "members": {"10": {}}},
+        "3": {"name": "Старый", "members": {}},
+        "4": {"name": NON_DISPLAY_CHARACTER + "Скрытый", "members": {"10": {}}},
+    }})
+    assert listings.category_listing(projects_data, "other") == (
+        ["Лимит 2/3", "Без лимита 1", "Старый 0"], ["1", "2", "3"])
+    assert listings.category_listing(projects_data, "other", user_id="10")[0] == [
+        "Лимит 2/3", "Без лимита 1", "Старый 0", "Скрытый 1"]
+    assert listings.category_listing(projects_data, "other", is_editing_mode=True)[0] == [
+        "Лимит 2/3", "Без лимита 1", "Старый 0", NON_DISPLAY_CHARACTER + "Скрытый 1"]
@@ -0,0 +1,71 @@
+import asyncio
+import locks
+
+# У каждого теста свой файл в ключах: состояние блокировок привязано к event loop
+
+def test_normalize_sorts_and_drops_keys_covered_by_whole_file():
+    keys = [("b.json", "2"), ("a.json", "9"), ("b.json", "1"), ("a.json",), ("b.json", "2"), ("a.json", "1")]
+    assert locks._normalize(keys) == [("a.json",), ("b.json", "1"), ("b.json", "2")]
+
+def test_same_entity_is_serialized():
+    key = ("serialized.json", "1")
+    counter = {"value": 0}
+
+    async def increment():
+        async with locks.lock(key):
+            value = counter["value"]
+            await asyncio.sleep(0)
+            counter["value"] = value + 1
+
+    async def main():
+        await asyncio.gather(*(increment() for _ in range(50)))
+
+    asyncio.run(main())
+    assert counter["value"] == 50
+
+def test_opposite_order_does_not_deadlock():
+    first, second = ("deadlock.json", "1"), ("deadlock.json", "2")
+    done = []
+
+    async def worker(name, keys):
+        for _ in range(20):
+            async with locks.lock(*keys):
+                await asyncio.sleep(0)
+        done.append(name)
+
+    async def main():
+        await asyncio.wait_for(asyncio.gather(worker("a", (first, second)), worker("b", (second, first))), 5)
+
+    asyncio.run(main())
+    assert sorted(done) == ["a", "b"]
+
+def test_waiting_whole_file_lock_goes_before_new_entities():
+    file_path = "priority.json"
+    events = []
+
+    async def hold(key, name, entered: asyncio.Event = None, release: asyncio.Event = None):
+        async with locks.lock(key):
+            events.append(f"+{name}")
+            if entered:
+                entered.set()
+            if release:
+                await release.wait()
+            else:
+                await asyncio.sleep(0)
+            events.append(f"-{name}")
+
+    async def main():
+        entered, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold((file_path, "1"), "entity1", entered, release))
+        await entered.wait()
+        whole = asyncio.create_task(hold(locks.whole(file_path), "file"))
+        await asyncio.sleep(0)
+        # Блокировка файла уже ждёт: новая сущность того же файла встаёт за ней
+        late = asyncio.create_task(hold((file_path, "2"), "entity2"))
+        await asyncio.sleep(0)
+        assert events == ["+entity1"]
+        release.set()
+        await asyncio.wait_for(asyncio.gather(holder, whole, late), 5)
+
+    asyncio.run(main())
+    assert events == ["+entity1", "-entity1", "+file", "-file", "+entity2", "-entity2"]
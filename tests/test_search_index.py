@@ -0,0 +1,106 @@
+import random
+import support
+import search_index
+from store import Edit, freeze
+from config import PATH_TO_USERS_FILE, NON_DISPLAY_CHARACTER
+
+_NAMES = ["Алёна", "Алена", "Иван", "Иванна", "Пётр", "Не указано", ""]
+
+def _random_user(rng):
+    """Пользователь с небольшим выбором значений, чтобы значения совпадали у разных пользователей"""
+    user = {
+        "username": rng.choice(["@ivan", "@Ivan_2", "@petr", "Не указано", ""]),
+        "name": rng.choice(_NAMES),
+        "surname": rng.choice(["Иванов", "Иванова", "Ёлкин", "Петров", ""]),
+        "IDfirst": rng.choice(["123456789", "987654321", "12345", "Не указано"]),
+        "phone": rng.choice(["+7-912-345-67-89", NON_DISPLAY_CHARACTER + "+7-912-345-67-89", "+7-900-000-00-00", "Не указано"]),
+        "score": 0,
+    }
+    for field in rng.sample(list(user), rng.randrange(2)):
+        del user[field]
+    return user
+
+def _random_edits(rng, steps=300):
+    """Снимки users после случайных правок; индекс обновляется по записям изменений"""
+    users_data = freeze({str(1000 + i): _random_user(rng) for i in range(30)})
+    search_index._ensure(users_data)
+    for _ in range(steps):
+        edit = Edit(PATH_TO_USERS_FILE, users_data)
+        user_id = str(1000 + rng.randrange(40))
+        action = rng.random()
+        if action < 0.5 and user_id in users_data:
+            field = rng.choice(["username", "name", "surname", "IDfirst", "phone"])
+            edit.set((user_id, field), _random_user(rng).get(field, ""))
+        elif action < 0.7:
+            edit.delete((user_id,))
+        else:
+            edit.set((user_id,), _random_user(rng))
+        users_data = support.publish(edit)
+        assert search_index._ensure.__self__.snapshot is users_data
+        yield users_data
+
+def _exact_oracle(users_data, query):
+    """Точные совпадения, как их искал обход всех пользователей в perform_user_search"""
+    normalized = query.lower().strip()
+    found = []
+    for user_id, user_data in users_data.items():
+        username = user_data.get("username", "")
+        id_first = user_data.get("IDfirst", "")
+        phone = user_data.get("phone", "")
+        if (normalized == user_id or
+                normalized == username.lower().replace("@", "") or
+                normalized == id_first.lower() or
+                normalized == phone.strip(NON_DISPLAY_CHARACTER).lower().replace("-", "").replace("+", "") or
+                query == username or query == id_first or query == phone):
+            found.append(user_id)
+    return sorted(found)
+
+def test_exact_matches_follow_change_feed():
+    rng = random.Random(0)
+    queries = ["ivan", "@Ivan_2", "ivan_2", "123456789", "12345", "79123456789", "+7-912-345-67-89",
+               "1005", "не указано", "Не указано", "petr"]
+    for users_data in _random_edits(rng):
+        for query in queries:
+            assert search_index.exact_matches(users_data, query) == _exact_oracle(users_data, query)
+
+def _index_state():
+    return [{key: set(users) for key, users in index.items()} for index in search_index._INDEXES]
+
+def test_trigram_indexes_match_rebuild():
+    rng = random.Random(1)
+    for users_data in _random_edits(rng):
+        maintained = _index_state()
+        search_index._rebuild(users_data)
+        assert maintained == _index_state()
+
+def _substring_oracle(users_data, query):
+    """Совпадения подстроки, как в fuzzy_user_search"""
+    query = query.lower().strip()
+    found = set()
+    for user_id, user_data in users_data.items():
+        phone = user_data.get("phone", "").strip(NON_DISPLAY_CHARACTER).lower().replace("-", "").replace("+", "")
+        if (query in user_id or query in user_data.get("username", "").lower() or
+                query in user_data.get("IDfirst", "").lower() or query in phone):
+            found.add(user_id)
+    return found
+
+def _name_oracle(users_data, query):
+    """Пользователи по убыванию числа общих с запросом триграмм имени и фамилии"""
+    query_trigrams = search_index.trigrams(query)
+    shared = {}
+    for user_id, user_data in users_data.items():
+        user_trigrams = search_index.trigrams(user_data.get("name", "")) | search_index.trigrams(user_data.get("surname", ""))
+        count = len(query_trigrams & user_trigrams)
+        if count:
+            shared[user_id] = count
+    return sorted(shared, key=lambda user_id: (-shared[user_id], user_id))
+
+def test_trigram_candidates_cover_scan_matches():
+    rng = random.Random(2)
+    substring_queries = ["iv", "ivan", "van_", "2345", "9123", "100", "1005", "67 89"]
+    name_queries = ["иван", "ивнов", "алена", "ёлкин петр", "ванна"]
+    for users_data in _random_edits(rng, steps=100):
+        for query in substring_queries:
+            assert _substring_oracle(users_data, query) <= set(search_index.substring_candidates(users_data, query))
+        for query in name_queries:
+            assert search_index.name_candidates(users_data, query) == _name_oracle(users_data, query)
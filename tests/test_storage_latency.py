@@ -0,0 +1,63 @@
+import time
+import asyncio
+import statistics
+import support
+import utils
+from store import freeze
+from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
+
+# Обработчик читает данные из кэша, пока в потоке хранилища пишется большой users.json:
+# p99 задержки не должна расти до времени записи, как при записи в event loop.
+
+USERS = 20000
+TICK = 0.002
+
+async def _handler_latencies(stop: asyncio.Event):
+    """Задержки 'обработчиков': опоздание пробуждения event loop плюс чтение users и projects"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        await utils.read_json_file_async(PATH_TO_USERS_FILE)
+        await utils.read_json_file_async(PATH_TO_PROJECTS_FILE)
+        latencies.append(time.perf_counter() - started - TICK)
+    return latencies
+
+def _p99(values):
+    return statistics.quantiles(values, n=100)[98]
+
+async def _measure(write):
+    stop = asyncio.Event()
+    handlers = asyncio.create_task(_handler_latencies(stop))
+    await asyncio.sleep(0.2)
+    started = time.perf_counter()
+    await write()
+    write_seconds = time.perf_counter() - started
+    await asyncio.sleep(0.05)
+    stop.set()
+    return await handlers, write_seconds
+
+def test_handler_p99_stays_flat_during_large_write():
+    async def main():
+        # Обработчики сохраняют неизменяемые снимки из store.edit(), их повторно не копируют
+        users = freeze(support.synthetic_users(USERS))
+        assert await utils.write_json_file_async(PATH_TO_USERS_FILE, users)
+        assert await utils.write_json_file_async(PATH_TO_PROJECTS_FILE, {"other": {}})
+
+        idle, _ = await _measure(lambda: asyncio.sleep(0.3))
+        during, write_seconds = await _measure(lambda: utils.write_json_file_async(PATH_TO_USERS_FILE, users))
+        # Та же запись прямо в event loop - для сравнения
+        async def write_in_loop():
+            assert utils.write_json_file(PATH_TO_USERS_FILE, users)
+        blocked, _ = await _measure(write_in_loop)
+        return idle, during, blocked, write_seconds
+
+    idle, during, blocked, write_seconds = asyncio.run(main())
+    print(f"\nзапись {USERS} пользователей: {write_seconds * 1000:.0f} мс; p99 обработчика: "
+          f"без записи {_p99(idle) * 1000:.1f} мс, во время записи {_p99(during) * 1000:.1f} мс, "
+          f"запись в event loop {max(blocked) * 1000:.0f} мс")
+    # Запись в event loop останавливает обработчики на всё время записи
+    assert max(blocked) > write_seconds / 2
+    # В потоке хранилища остаётся только ожидание GIL (интервал переключения - 5 мс)
+    assert _p99(during) < 0.1
+    assert _p99(during) < max(blocked) / 3
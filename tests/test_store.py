@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+import serializers
+import store
+import utils
+
+def _data_file(tmp_path, name, data):
+    file_path = str(tmp_path / name)
+    assert utils._write_json_now(file_path, data)
+    return file_path
+
+def test_edit_copies_only_the_changed_path():
+    base = store.freeze({"1": {"score": 1, "active_projects": ["a"]}, "2": {"score": 2}})
+    edit = store.Edit("users.json", base)
+    edit.set(("1", "score"), 5)
+    edit.add(("1", "active_projects"), "b")
+    edit.discard(("1", "active_projects"), "a")
+
+    assert base == {"1": {"score": 1, "active_projects": ["a"]}, "2": {"score": 2}}
+    assert edit.data == {"1": {"score": 5, "active_projects": ["b"]}, "2": {"score": 2}}
+    assert edit.data["2"] is base["2"]
+    with pytest.raises(TypeError):
+        edit.data["1"]["score"] = 6
+    with pytest.raises(TypeError):
+        edit.data["1"]["active_projects"].append("c")
+
+def test_commit_rebases_onto_concurrent_edit(tmp_path):
+    file_path = _data_file(tmp_path, "users.json", {"1": {"score": 1}, "2": {"score": 2}})
+
+    async def main():
+        async def edit(user_id, score, hold):
+            async with store.edit(file_path) as users:
+                await hold
+                users.set((user_id, "score"), score)
+            return users
+
+        released = asyncio.get_running_loop().create_future()
+        # Обе правки начаты с одного снимка, вторая сохраняется позже первой
+        slow = asyncio.create_task(edit("1", 10, released))
+        fast = asyncio.create_task(edit("2", 20, asyncio.sleep(0)))
+        await fast
+        released.set_result(None)
+        slow_edit = await slow
+        assert fast.result().saved and slow_edit.saved
+        assert slow_edit.base is utils.read_json_file(file_path)
+
+    asyncio.run(main())
+    assert utils.read_json_file(file_path) == {"1": {"score": 10}, "2": {"score": 20}}
+    assert serializers.load_file(file_path) == {"1": {"score": 10}, "2": {"score": 20}}
+    utils.invalidate_cache(file_path)
+
+def test_failed_edit_publishes_nothing(tmp_path):
+    file_path = _data_file(tmp_path, "users.json", {"1": {"score": 1}})
+
+    async def main():
+        before = await utils.read_json_file_async(file_path)
+        with pytest.raises(RuntimeError):
+            async with store.edit(file_path) as users:
+                users.set(("1", "score"), 5)
+                raise RuntimeError
+        assert await utils.read_json_file_async(file_path) is before
+
+    asyncio.run(main())
+    assert serializers.load_file(file_path) == {"1": {"score": 1}}
+    utils.invalidate_cache(file_path)
+
+def test_commit_saves_several_files_together(tmp_path):
+    users_path = _data_file(tmp_path, "users.json", {"1": {"active_projects": []}})
+    projects_path = _data_file(tmp_path, "projects.json", {"other": {"1": {"members": {}}}})
+
+    async def main():
+        users = store.Edit(users_path, await utils.read_json_file_async(users_path))
+        projects = store.Edit(projects_path, await utils.read_json_file_async(projects_path))
+        users.add(("1", "active_projects"), "other:::1")
+        projects.set(("other", "1", "members", "1"), {"role": "участник"})
+        assert await store._commit([users, projects])
+        assert utils.read_json_file(users_path) is users.data
+        assert utils.read_json_file(projects_path) is projects.data
+
+    asyncio.run(main())
+    assert serializers.load_file(users_path) == {"1": {"active_projects": ["other:::1"]}}
+    assert serializers.load_file(projects_path) == {"other": {"1": {"members": {"1": {"role": "участник"}}}}}
+    utils.invalidate_cache(users_path)
+    utils.invalidate_cache(projects_path)
+
+def test_freeze_shares_equal_strings_and_empty_lists():
+    data = store.freeze({"1": {"name": "Мария", "active_projects": []},
+                         "2": {"name": "Мария", "active_projects": []}})
+    assert data["1"]["name"] is data["2"]["name"]
+    assert data["1"]["active_projects"] is data["2"]["active_projects"]
+    edit = store.Edit("users.json", data)
+    edit.add(("1", "active_projects"), "other:::1")
+    assert edit.data["1"]["active_projects"] == ["other:::1"]
+    assert edit.data["2"]["active_projects"] == [] and data["1"]["active_projects"] == []
@@ -2,68 +2,475 @@ import os
 import json
 import re
 import datetime
-import time
-from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import config
+import journal
+import serializers
 from config import PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE
 
-# Кэш для уменьшения чтения файлов
+# "json" - файлы users.json/projects.json, "sqlite" - база PATH_TO_DATABASE_FILE,
+# "sharded" - файл на каждого пользователя и проект в PATH_TO_DATA_FOLDER
+STORAGE_BACKEND = getattr(config, "STORAGE_BACKEND", "json")
+# Журнал изменений: вместо перезаписи файла изменения дописываются в <файл>.log
+JOURNAL_MODE = getattr(config, "JOURNAL_MODE", False)
+JOURNAL_COMPACT_RECORDS = getattr(config, "JOURNAL_COMPACT_RECORDS", 500)
+JOURNAL_COMPACT_SECONDS = getattr(config, "JOURNAL_COMPACT_SECONDS", 60)
+# Окно объединения записей (секунд): записи внутри окна сбрасываются на диск одной. 0 - писать сразу
+WRITE_COALESCE_WINDOW = getattr(config, "WRITE_COALESCE_WINDOW", 0)
+
+logger = logging.getLogger(__name__)
+
+# Кэш для уменьшения чтения файлов: данные действительны, пока файл
+# (и его журнал) не изменился на диске - проверяется по (mtime_ns, size, inode)
 _file_cache = {}
-_cache_timestamps = {}
-CACHE_DURATION = 30  # секунд
+_cache_signatures = {}
+_cache_stats = {"hits": 0, "misses": 0, "reparses": 0}
+
+# Разбор, сериализация и запись на диск выполняются в отдельном потоке,
+# чтобы большие файлы не останавливали обработку обновлений в event loop
+_io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+_write_lock = threading.Lock()
+_loading = {}
+
+# Отложенные записи: последние данные файла, таймер сброса и запись в процессе
+_pending_writes = {}
+_flush_handles = {}
+_flush_futures = {}
+# Количество наших записей файла, ещё не дошедших до диска
+_writes_in_flight = {}
+
+# Подписчики на опубликованные изменения: listener(file_path, previous, snapshot, changes)
+_change_listeners = []
+
+def _entity_storage(file_path: str):
+    """Модуль хранилища users/projects, если они лежат не в JSON файлах"""
+    if file_path not in (PATH_TO_USERS_FILE, PATH_TO_PROJECTS_FILE):
+        return None
+    if STORAGE_BACKEND == "sqlite":
+        import sqlite_storage
+        return sqlite_storage
+    if STORAGE_BACKEND == "sharded":
+        import sharded_storage
+        return sharded_storage
+    return None
+
+def _load_data(file_path: str) -> Dict[str, Any]:
+    storage = _entity_storage(file_path)
+    if storage:
+        return storage.load(file_path)
+    data = {}
+    if os.path.exists(file_path):
+        data = serializers.load_file(file_path)
+    for change in journal.read(file_path):
+        apply_change(data, change)
+    return data
+
+def _file_signature(file_path: str) -> Tuple:
+    """(mtime_ns, size, inode) файла данных и его журнала"""
+    if _entity_storage(file_path):
+        # База и файлы сущностей меняются только самим ботом
+        return ()
+    signature = []
+    for path in (file_path, journal.journal_path(file_path), journal.compacting_path(file_path)):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def _cached(file_path: str) -> Optional[Dict[str, Any]]:
+    if file_path not in _file_cache:
+        _cache_stats["misses"] += 1
+        return None
+    # Пока наша запись не дошла до диска, файл старше кэша - верим кэшу
+    if (_writes_in_flight.get(file_path) or file_path in _pending_writes or
+            _cache_signatures.get(file_path) == _file_signature(file_path)):
+        _cache_stats["hits"] += 1
+        return _file_cache[file_path]
+    _cache_stats["reparses"] += 1
+    invalidate_cache(file_path)
+    return None
+
+def _set_cache(file_path: str, data: Dict[str, Any], signature: Tuple = None):
+    from store import freeze
+    _file_cache[file_path] = freeze(data)
+    _cache_signatures[file_path] = _file_signature(file_path) if signature is None else signature
+
+def _write_started(file_path: str):
+    _writes_in_flight[file_path] = _writes_in_flight.get(file_path, 0) + 1
+
+def _write_finished(file_path: str):
+    """Запомнить состояние файла после нашей записи, чтобы не перечитывать его"""
+    left = _writes_in_flight.get(file_path, 1) - 1
+    if left:
+        _writes_in_flight[file_path] = left
+        return
+    _writes_in_flight.pop(file_path, None)
+    if file_path in _file_cache and file_path not in _pending_writes:
+        _cache_signatures[file_path] = _file_signature(file_path)
+
+def _submit_write(file_paths: List[str], func, *args) -> asyncio.Future:
+    """Поставить запись файлов в очередь потока хранилища.
+
+    Запись ставится в очередь сразу, а не при первом await, поэтому
+    снимки попадают на диск в том же порядке, в каком публикуются в кэш."""
+    for file_path in file_paths:
+        _write_started(file_path)
+    future = asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
+
+    def done(_):
+        for file_path in file_paths:
+            _write_finished(file_path)
+    future.add_done_callback(done)
+    return future
+
+async def run_in_storage_thread(func, *args):
+    """Выполнить func в потоке хранилища, по порядку с записями файлов данных"""
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
+
+def _completed(result: bool) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
+def _load_snapshot(file_path: str) -> Tuple[Tuple, Dict[str, Any]]:
+    # Подпись снимается до чтения: если файл изменится во время разбора, его перечитают
+    from store import freeze
+    signature = _file_signature(file_path)
+    if not _entity_storage(file_path) and not os.path.exists(file_path) and not journal.exists(file_path):
+        return signature, freeze({})
+    try:
+        return signature, freeze(_load_data(file_path))
+    except (json.JSONDecodeError, Exception):
+        return signature, freeze({})
+
+def get_cache_stats() -> Dict[str, int]:
+    """Счётчики кэша: попадания, первые чтения и перечитывания изменившихся файлов"""
+    return dict(_cache_stats)
 
 def read_json_file(file_path: str) -> Dict[str, Any]:
     """Чтение JSON файла с кэшированием"""
-    current_time = time.time()
+    data = _cached(file_path)
+    if data is not None:
+        return data
     
-    # Проверяем актуальность кэша
-    if (file_path in _file_cache and 
-        file_path in _cache_timestamps and
-        current_time - _cache_timestamps[file_path] < CACHE_DURATION):
-        return _file_cache[file_path]
+    signature, data = _load_snapshot(file_path)
+    _set_cache(file_path, data, signature)
+    return data
+
+async def read_json_file_async(file_path: str) -> Dict[str, Any]:
+    """Чтение JSON файла с кэшированием, разбор файла - в потоке хранилища"""
+    data = _cached(file_path)
+    if data is not None:
+        return data
     
-    # Чтение из файла
-    if not os.path.exists(file_path):
-        _file_cache[file_path] = {}
-        _cache_timestamps[file_path] = current_time
-        return {}
+    # Одновременные промахи кэша ждут одно и то же чтение
+    future = _loading.get(file_path)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(_io_executor, _load_snapshot, file_path)
+        _loading[file_path] = future
+        future.add_done_callback(lambda _: _loading.pop(file_path, None))
+    signature, data = await asyncio.shield(future)
     
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            _file_cache[file_path] = data
-            _cache_timestamps[file_path] = current_time
-            return data
-    except (json.JSONDecodeError, Exception):
-        _file_cache[file_path] = {}
-        _cache_timestamps[file_path] = current_time
-        return {}
+    # Пока файл читался, кэш мог обновиться записью - она свежее
+    if file_path in _file_cache:
+        return _file_cache[file_path]
+    _set_cache(file_path, data, signature)
+    return data
 
 def write_json_file(file_path: str, data: Dict[str, Any]) -> bool:
     """Запись в JSON файл с обновлением кэша"""
-    try:
-        os.makedirs(os.path.dirname(file_path) if os.path.dirname(file_path) else '.', exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-        
-        _file_cache[file_path] = data
-        _cache_timestamps[file_path] = time.time()
+    storage = _entity_storage(file_path)
+    if storage:
+        if not storage.replace_all(file_path, data):
+            return False
+        _set_cache(file_path, data)
         return True
-    except Exception:
+
+    if WRITE_COALESCE_WINDOW > 0 and _schedule_write(file_path, data):
+        _set_cache(file_path, data)
+        return True
+
+    journal.begin_compaction(file_path)
+    if not _write_json_now(file_path, data):
+        return False
+    _set_cache(file_path, data)
+    return True
+
+async def write_json_file_async(file_path: str, data: Dict[str, Any]) -> bool:
+    """Запись в JSON файл с обновлением кэша, сериализация и запись - в потоке хранилища"""
+    _set_cache(file_path, data)
+    success = await _submit_snapshot(file_path, data)
+    if not success:
+        invalidate_cache(file_path)
+    return success
+
+def _submit_snapshot(file_path: str, data: Dict[str, Any]) -> asyncio.Future:
+    storage = _entity_storage(file_path)
+    if storage:
+        return _submit_write([file_path], storage.replace_all, file_path, data)
+    if WRITE_COALESCE_WINDOW > 0 and _schedule_write(file_path, data):
+        return _completed(True)
+    journal.begin_compaction(file_path)
+    return _submit_write([file_path], _write_json_now, file_path, data)
+
+def _write_json_now(file_path: str, data: Dict[str, Any]) -> bool:
+    """Атомарная запись: временный файл, fsync и переименование поверх старого"""
+    directory = os.path.dirname(file_path) if os.path.dirname(file_path) else '.'
+    tmp_path = file_path + ".tmp"
+    with _write_lock:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            raw = serializers.dumps(data)
+            
+            with open(tmp_path, 'wb') as file:
+                file.write(raw)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, file_path)
+            _fsync_directory(directory)
+            
+            # Снимок содержит все изменения, отложенные в журнале до начала записи
+            journal.end_compaction(file_path)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи {file_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+def _fsync_directory(directory: str):
+    """Сохранить на диск запись о переименовании (на Windows не поддерживается)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _schedule_write(file_path: str, data: Dict[str, Any]) -> bool:
+    """Отложить запись до конца окна объединения (только внутри event loop)"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
         return False
+    _pending_writes[file_path] = data
+    if file_path not in _flush_handles:
+        _flush_handles[file_path] = loop.call_later(WRITE_COALESCE_WINDOW, _flush_pending, file_path)
+    return True
+
+def _flush_pending(file_path: str):
+    """Отправить отложенную запись файла в поток хранилища"""
+    _flush_handles.pop(file_path, None)
+    data = _pending_writes.pop(file_path, None)
+    if data is None:
+        return
+
+    journal.begin_compaction(file_path)
+    _write_started(file_path)
+    future = asyncio.get_running_loop().run_in_executor(_io_executor, _write_json_now, file_path, data)
+    _flush_futures[file_path] = future
+
+    def done(_):
+        if _flush_futures.get(file_path) is future:
+            _flush_futures.pop(file_path)
+        _write_finished(file_path)
+        if not future.result():
+            # Не получилось - попробуем ещё раз в следующем окне, если не пришли более свежие данные
+            _schedule_write(file_path, _pending_writes.get(file_path, data))
+    future.add_done_callback(done)
+
+async def flush_json_file(file_path: str = None) -> bool:
+    """Дождаться записи на диск отложенных изменений файла (или всех файлов)"""
+    file_paths = [file_path] if file_path else list(set(_pending_writes) | set(_flush_futures))
+    success = True
+    for path in file_paths:
+        handle = _flush_handles.pop(path, None)
+        if handle:
+            handle.cancel()
+        _flush_pending(path)
+        future = _flush_futures.get(path)
+        if future is not None:
+            success = await asyncio.shield(future) and success
+    return success
 
 def invalidate_cache(file_path: str = None):
     """Сброс кэша"""
     if file_path:
         _file_cache.pop(file_path, None)
-        _cache_timestamps.pop(file_path, None)
+        _cache_signatures.pop(file_path, None)
     else:
         _file_cache.clear()
-        _cache_timestamps.clear()
+        _cache_signatures.clear()
+
+Change = Tuple[str, Tuple, Any]  # (op, path, value): op - "set", "delete", "add", "discard"
+
+def apply_change(data: Dict[str, Any], change: Change):
+    """Применить изменение к данным. Все операции идемпотентны, поэтому
+    повторное применение журнала поверх свежего снимка безопасно."""
+    op, path, value = change
+    parent = data
+    for key in path[:-1]:
+        if not isinstance(parent, dict) or key not in parent:
+            return
+        parent = parent[key]
+    key = path[-1]
+
+    if op == "set":
+        parent[key] = value
+    elif op == "delete":
+        parent.pop(key, None)
+    elif op == "add":
+        items = parent.setdefault(key, [])
+        if value not in items:
+            items.append(value)
+    elif op == "discard":
+        items = parent.get(key, [])
+        if value in items:
+            items.remove(value)
+
+async def save_changes(file_path: str, data: Dict[str, Any], changes: List[Change]) -> bool:
+    """Сохранение изменений, уже внесённых в data (из read_json_file_async).
+
+    В режиме json файл перезаписывается целиком, с JOURNAL_MODE изменения
+    дописываются в журнал, в режиме sqlite каждое изменение превращается
+    в обновление одной строки, в режиме sharded перезаписываются только
+    файлы затронутых сущностей. Запись на диск идёт в потоке хранилища.
+    """
+    return await save_changes_batch([(file_path, data, changes)])
+
+async def save_changes_batch(batch: List[Tuple[str, Dict[str, Any], List[Change]]]) -> bool:
+    """Сохранение изменений нескольких файлов (file_path, data, changes) вместе.
+
+    Новые данные всех файлов публикуются в кэш одновременно, каждый файл
+    записывается один раз, а в режиме sqlite все изменения идут одной транзакцией.
+    """
+    batch = [(file_path, data, changes) for file_path, data, changes in batch if changes]
+    if not batch:
+        return True
+
+    for file_path, data, changes in batch:
+        previous = _file_cache.get(file_path)
+        _set_cache(file_path, data)
+        _notify_listeners(file_path, previous, _file_cache[file_path], changes)
+
+    file_paths = [file_path for file_path, _, _ in batch]
+    if STORAGE_BACKEND == "sqlite" and all(_entity_storage(file_path) for file_path in file_paths):
+        from sqlite_storage import apply_changes_batch
+        items = [(file_path, changes) for file_path, _, changes in batch]
+        futures = [_submit_write(file_paths, apply_changes_batch, items)]
+    else:
+        futures = [_submit_changes(file_path, data, changes) for file_path, data, changes in batch]
+
+    success = all(await asyncio.gather(*futures))
+    if not success:
+        for file_path in file_paths:
+            invalidate_cache(file_path)
+    return success
+
+def add_change_listener(listener):
+    """Подписаться на изменения, сохраняемые через save_changes/save_changes_batch.
+
+    Слушатель вызывается сразу после публикации нового снимка в кэш с
+    предыдущим снимком, новым снимком и записями изменений (op, path, value).
+    """
+    _change_listeners.append(listener)
+
+class SnapshotIndex:
+    """Структура, производная от опубликованного снимка файла (индексы, рейтинг, списки).
+
+    rebuild(data) строит её по снимку целиком, apply(snapshot, changes) переносит
+    записи изменений. Если индекс построен не по предыдущему снимку (или apply
+    упал), он перестраивается при следующем ensure()."""
+    __slots__ = ("file_path", "snapshot", "_rebuild", "_apply")
+
+    def __init__(self, file_path: str, rebuild, apply):
+        self.file_path = file_path
+        self.snapshot = None
+        self._rebuild = rebuild
+        self._apply = apply
+        add_change_listener(self._on_change)
+
+    def _on_change(self, file_path: str, previous, snapshot, changes: List[Change]):
+        if file_path != self.file_path:
+            return
+        if self.snapshot is None or previous is not self.snapshot:
+            self.snapshot = None
+            return
+        self.snapshot = None
+        self._apply(snapshot, changes)
+        self.snapshot = snapshot
+
+    def ensure(self, data: Dict[str, Any]):
+        """Привести структуру к снимку data"""
+        if data is not self.snapshot:
+            self.snapshot = None
+            self._rebuild(data)
+            self.snapshot = data
+
+def _notify_listeners(file_path: str, previous, snapshot, changes: List[Change]):
+    for listener in _change_listeners:
+        try:
+            listener(file_path, previous, snapshot, changes)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработчика изменений {file_path}: {e}")
+
+def _submit_changes(file_path: str, data: Dict[str, Any], changes: List[Change]) -> asyncio.Future:
+    storage = _entity_storage(file_path)
+    if storage and STORAGE_BACKEND == "sqlite":
+        return _submit_write([file_path], storage.apply_changes, file_path, changes)
+    if storage:
+        writes = storage.collect_writes(file_path, data, changes)
+        return _submit_write([file_path], storage.write_entities, writes)
+    if JOURNAL_MODE:
+        return _submit_write([file_path], journal.append, file_path, changes)
+    return _submit_snapshot(file_path, data)
+
+def compact_journal(file_path: str) -> bool:
+    """Сжать журнал: записать актуальный снимок и удалить журнал"""
+    if not journal.exists(file_path):
+        return True
+    try:
+        # В кэше уже применены все изменения из журнала
+        data = _file_cache[file_path] if file_path in _file_cache else _load_data(file_path)
+    except Exception:
+        return False
+    return write_json_file(file_path, data)
+
+def _load_frozen(file_path: str) -> Tuple[Tuple, Dict[str, Any]]:
+    from store import freeze
+    signature = _file_signature(file_path)
+    return signature, freeze(_load_data(file_path))
+
+async def compact_journal_async(file_path: str) -> bool:
+    """Сжать журнал, не блокируя event loop"""
+    if not journal.exists(file_path):
+        return True
+    if file_path not in _file_cache:
+        try:
+            signature, data = await run_in_storage_thread(_load_frozen, file_path)
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения {file_path} для сжатия журнала: {e}")
+            return False
+        # Кэш обновляется только из event loop, как и после записи
+        if file_path not in _file_cache:
+            _set_cache(file_path, data, signature)
+    return await write_json_file_async(file_path, _file_cache[file_path])
 
 async def check_authorization(user_id: str) -> bool:
     """Проверка авторизации пользователя"""
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = data.get(str(user_id), {})
     
     if user_data.get("ban", 0) == 1:
@@ -73,7 +480,7 @@ async def check_authorization(user_id: str) -> bool:
 
 async def check_user_consent(user_id: str) -> bool:
     """Проверка соглашения пользователя на обработку данных"""
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = data.get(str(user_id), {})
     
     if user_data.get("consent_accepted", False) != False:
@@ -82,7 +489,7 @@ async def check_user_consent(user_id: str) -> bool:
 
 async def is_moderator(user_id: str) -> bool:
     """Проверка является ли пользователь модератором"""
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = data.get(str(user_id), {})
     
     if user_data.get("ban", 0) == 1:
@@ -96,7 +503,7 @@ async def send_not_authorized(message, state=None):
     from states import ActiveState
     
     user_id = str(message.from_user.id)
-    data = read_json_file(PATH_TO_USERS_FILE)
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
     user_data = data.get(user_id, {})
     
     if user_data.get("ban", 0) == 1:
@@ -128,6 +535,25 @@ async def show_consent_agreement(message, state):
         parse_mode="HTML"
     )
 
+async def send_project_photo(send, category: str, project_id: str, project: Dict[str, Any], **kwargs):
+    """Отправка фото проекта через send (answer_photo/send_photo).
+    Повторно - по сохранённому file_id Telegram, в первый раз - загрузкой файла с диска"""
+    from aiogram.types import FSInputFile
+    from services import set_preview_file_id
+
+    file_id = project.get("preview_file_id")
+    if file_id:
+        try:
+            return await send(photo=file_id, **kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось отправить фото проекта {category}:::{project_id} по file_id, загружаем заново: {e}")
+
+    photo_path = project.get("preview_photo")
+    sent = await send(photo=FSInputFile(photo_path, filename=os.path.basename(photo_path)), **kwargs)
+    if sent.photo:
+        await set_preview_file_id(category, project_id, photo_path, sent.photo[-1].file_id)
+    return sent
+
 async def phone_number_validating(number: str) -> Optional[str]:
     """Валидация номера телефона"""
     n = ''.join(filter(lambda x: x.isdigit(), number))
@@ -173,44 +599,86 @@ async def format_member_count(count: int) -> str:
     else:
         return f"{count} участник"
 
+# Готовый текст топа: top_n -> (версия видимой части рейтинга, строки, текст)
+_leaderboard_cache: Dict[int, Tuple[int, List[str], str]] = {}
+
+async def _cached_top(data, top_n) -> Tuple[List[str], str]:
+    """Строки и текст топа; топ из первых USER_IN_LEADERBOARD мест берётся из кэша"""
+    import leaderboard
+    count = top_n or leaderboard.size(data)
+    if not top_n or top_n > config.USER_IN_LEADERBOARD:
+        lines = await _render_range(data, 0, count)
+        return lines, '\n'.join(lines)
+    version = leaderboard.version(data)
+    cached = _leaderboard_cache.get(top_n)
+    if cached is None or cached[0] != version:
+        lines = await _render_range(data, 0, count)
+        cached = _leaderboard_cache[top_n] = (version, lines, '\n'.join(lines))
+    return cached[1], cached[2]
+
 async def get_leaderboard(user_id:str, top_n=None):
-    data = read_json_file(PATH_TO_USERS_FILE)
-    leaderboard_data = []
-    for user in data:
-        user = str(user)
-        name = f'{data[user].get("name") if data[user].get("name", "Не указано") != "Не указано" else ""} {data[user].get("surname", "Не указано") if data[user].get("surname", "Не указано") != "Не указано" else ""}'.strip()
-        if not name or name.isspace(): 
-            name = data[user].get("username", "Неизвестный пользователь")
-        leaderboard_data.append({
-            "user_id": user,
-            "user_name" : name,
-            "score" : int(data[user]["score"])
-            })    
-    leaderboard_data.sort(key=lambda x: x["score"], reverse=True)
-    user_rank = None
-    if user_id:
-        for rank, user in enumerate(leaderboard_data, 1):
-            if user["user_id"] == user_id:
-                user_rank = rank
-                break
-    if top_n:
-        leaderboard_data = leaderboard_data[:top_n]
+    import leaderboard
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
+    lines, _ = await _cached_top(data, top_n)
+    user_rank = leaderboard.rank_of(data, user_id) if user_id else None
+    return list(lines), user_rank
+
+async def get_leaderboard_text(user_id: str, top_n=None) -> Tuple[str, Optional[int]]:
+    """Текст топа (общий для всех) и место пользователя"""
+    import leaderboard
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
+    _, text = await _cached_top(data, top_n)
+    user_rank = leaderboard.rank_of(data, user_id) if user_id else None
+    return text, user_rank
+
+async def _render_range(data, start: int, count: int, user_id: str = None) -> List[str]:
+    """Строки мест start+1..start+count; группа с равными баллами нумеруется только показанными местами"""
+    import models
+    import leaderboard
+    entries = leaderboard.page(data, start, count)
+    start = max(start, 0)
     result = []
-    current_group = []
-    current_score = None
-    group_start_rank = 1
-    for i, user in enumerate(leaderboard_data):
-        if user["score"] != current_score:
-            if current_group:
-                result.extend(await format_group(current_group, group_start_rank, i))
-            current_group = [user]
-            current_score = user["score"]
-            group_start_rank = i + 1
-        else:
-            current_group.append(user)
-    if current_group:
-        result.extend(await format_group(current_group, group_start_rank, len(leaderboard_data)))
-    return result, user_rank
+    i = 0
+    while i < len(entries):
+        score = entries[i][1]
+        j = i
+        while j < len(entries) and entries[j][1] == score:
+            j += 1
+        group = [
+            {"user_id": uid, "user_name": models.user(data, uid).display_name, "score": score}
+            for uid, _ in entries[i:j]
+        ]
+        lines = await format_group(group, start + i + 1, start + j)
+        for user, line in zip(group, lines):
+            result.append(f"<b>{line}</b>" if user["user_id"] == user_id else line)
+        i = j
+    return result
+
+async def get_leaderboard_page(user_id: str, page: int, page_size: int) -> Tuple[str, Optional[int], int, int]:
+    """Текст страницы рейтинга, место пользователя, номер страницы и число страниц"""
+    import leaderboard
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
+    pages = max(1, -(-leaderboard.size(data) // page_size))
+    page = min(max(page, 0), pages - 1)
+    if page == 0:
+        _, text = await _cached_top(data, page_size)
+    else:
+        text = '\n'.join(await _render_range(data, page * page_size, page_size))
+    user_rank = leaderboard.rank_of(data, user_id) if user_id else None
+    return text, user_rank, page, pages
+
+async def get_leaderboard_around(user_id: str, page_size: int) -> Tuple[str, Optional[int], int, int]:
+    """Текст рейтинга ±AROUND_RANKS мест вокруг пользователя, его место, его страница и число страниц"""
+    import leaderboard
+    data = await read_json_file_async(PATH_TO_USERS_FILE)
+    user_rank = leaderboard.rank_of(data, user_id)
+    if user_rank is None:
+        return await get_leaderboard_page(user_id, 0, page_size)
+    pages = max(1, -(-leaderboard.size(data) // page_size))
+    start = max(user_rank - 1 - leaderboard.AROUND_RANKS, 0)
+    count = user_rank - start + leaderboard.AROUND_RANKS
+    text = '\n'.join(await _render_range(data, start, count, user_id))
+    return text, user_rank, (user_rank - 1) // page_size, pages
 
 async def get_medal(start_rank):
     if start_rank == 1: